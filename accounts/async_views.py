@@ -0,0 +1,374 @@
+"""
+Native async versions of the accounts endpoints for ASGI deployments.
+
+They are routed in place of the ``AuthViewSet`` actions, ``register`` and
+the ``UserViewSet`` read actions when ``ASYNC_AUTH_VIEWS`` is enabled (see
+``core/asgi.py``), so idle or slow clients hold no thread. Password hashing
+runs on the bounded hashing pool, so the event loop never blocks on PBKDF2
+and a saturated pool answers 503 straight away.
+
+The user views reuse ``UserViewSet`` for scoping, filtering, permissions
+and serialization. Writes to the same URLs are handed to the synchronous
+viewset. Cursor pagination is DRF code and runs through ``sync_to_async``;
+Django's async ORM queries use the same executor, so this costs no extra
+thread hop.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_safe
+from rest_framework.exceptions import APIException, NotFound, Throttled
+from rest_framework.request import Request
+
+from core.routers import replica_reads
+
+from accounts.conditional import (
+    ALL_USERS,
+    aget_scope_version,
+    conditional_response,
+    list_scope,
+    patch_list_headers,
+    scope_etag,
+    user_scope,
+)
+from accounts.hashing import (
+    HashingPoolSaturated,
+    aauthenticate_credentials,
+    get_hashing_pool,
+)
+from accounts.keyring import get_key_ring
+from accounts.middleware import auth_exempt
+from accounts.models import User
+from accounts.permissions import aget_permissions_version
+from accounts.renderers import FastJSONRenderer
+from accounts.response_cache import aget_or_build, response_cache_key
+from accounts.serializers import (
+    LoginSerializer,
+    RegisterSerializer,
+    TokenRefreshSerializer,
+)
+from accounts.sessions import arevoke_family
+from accounts.throttling import athrottle_wait, client_ident
+from accounts.utils import generate_tokens
+from accounts.views import (
+    UserViewSet,
+    analytics_day,
+    analytics_payload,
+    analytics_queries,
+    exchange_refresh_token,
+    refresh_token_family,
+)
+
+READ_METHODS = ("GET", "HEAD")
+
+# The synchronous views the user endpoints hand writes to.
+sync_user_list = UserViewSet.as_view(
+    {"get": "list", "post": "create"}, basename="user", detail=False
+)
+sync_user_detail = UserViewSet.as_view(
+    {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    },
+    basename="user",
+    detail=True,
+)
+
+
+def _request_data(request):
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+    return request.POST
+
+
+def _saturated_response():
+    return JsonResponse(
+        {"detail": HashingPoolSaturated.default_detail},
+        status=HashingPoolSaturated.status_code,
+        headers={"Retry-After": "1"},
+    )
+
+
+@auth_exempt
+@csrf_exempt
+@require_POST
+async def token(request):
+    """Endpoint to obtain JWT tokens"""
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({"detail": "Malformed JSON"}, status=400)
+    username = data.get("username") if hasattr(data, "get") else None
+    wait = await athrottle_wait("login", client_ident(request), username)
+    if wait:
+        return _throttled(wait)
+    serializer = LoginSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        user = await aauthenticate_credentials(
+            serializer.validated_data["username"],
+            serializer.validated_data["password"],
+        )
+    except HashingPoolSaturated:
+        return _saturated_response()
+
+    if not user:
+        return JsonResponse({"error": "Invalid credentials"}, status=401)
+
+    # Records the refresh token, so it needs a thread.
+    access_token, refresh_token = await sync_to_async(generate_tokens)(user)
+    return JsonResponse(
+        {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "role": user.role,
+            },
+        }
+    )
+
+
+@auth_exempt
+@csrf_exempt
+@require_POST
+async def register(request):
+    """Async user registration"""
+    wait = await athrottle_wait("register", client_ident(request))
+    if wait:
+        return _throttled(wait)
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({"detail": "Malformed JSON"}, status=400)
+    serializer = RegisterSerializer(data=data)
+    # Validation runs the username uniqueness query, so it needs a thread.
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    validated_data = dict(serializer.validated_data)
+    try:
+        validated_data["password"] = await get_hashing_pool().arun(
+            make_password, validated_data["password"]
+        )
+    except HashingPoolSaturated:
+        return _saturated_response()
+    validated_data["role"] = User.USER
+
+    user = await User.objects.acreate(**validated_data)
+    return JsonResponse(
+        {
+            "message": "User registered successfully",
+            "user": {"id": user.id, "username": user.username, "email": user.email},
+        },
+        status=201,
+    )
+
+
+@auth_exempt
+@csrf_exempt
+@require_POST
+async def refresh_token(request):
+    """Exchange a refresh token for a new token pair"""
+    wait = await athrottle_wait("refresh", client_ident(request))
+    if wait:
+        return _throttled(wait)
+    serializer, error = _validated(TokenRefreshSerializer, request)
+    if error:
+        return error
+    # Consuming a token is transactional, which the async ORM cannot do.
+    body, status = await sync_to_async(exchange_refresh_token)(
+        serializer.validated_data["refresh_token"]
+    )
+    return JsonResponse(body, status=status)
+
+
+@auth_exempt
+@csrf_exempt
+@require_POST
+async def logout(request):
+    """Revoke the refresh-token family the given token belongs to"""
+    serializer, error = _validated(TokenRefreshSerializer, request)
+    if error:
+        return error
+    family = refresh_token_family(serializer.validated_data["refresh_token"])
+    if family is None:
+        return JsonResponse({"error": "Invalid refresh token"}, status=401)
+    await arevoke_family(family)
+    return HttpResponse(status=204)
+
+
+@auth_exempt
+@require_safe
+async def jwks(request):
+    """Public keys for verifying our tokens without calling back here"""
+    return JsonResponse(
+        get_key_ring().jwks(), headers={"Cache-Control": "public, max-age=300"}
+    )
+
+
+@csrf_exempt
+async def user_list(request):
+    """``UserViewSet.list``; other methods go to the synchronous viewset"""
+    if request.method not in READ_METHODS:
+        return await sync_to_async(sync_user_list)(request)
+    view = _user_viewset(request, "list", detail=False)
+    try:
+        view.check_permissions(view.request)
+        queryset = view.filter_queryset(view.get_queryset())
+        return await _cached_read(
+            request, list_scope(request.user), _page_builder(view, queryset)
+        )
+    except APIException as exc:
+        return _error(exc)
+
+
+@csrf_exempt
+async def user_detail(request, pk):
+    """``UserViewSet.retrieve``; other methods go to the synchronous viewset"""
+    if request.method not in READ_METHODS:
+        return await sync_to_async(sync_user_detail)(request, pk=pk)
+    view = _user_viewset(request, "retrieve", detail=True, pk=pk)
+    try:
+        view.check_permissions(view.request)
+        try:
+            with replica_reads():
+                user = await view.filter_queryset(view.get_queryset()).aget(pk=pk)
+        except (User.DoesNotExist, DjangoValidationError, ValueError, TypeError):
+            raise NotFound("No User matches the given query.")
+        # Object checks may have to load the role permission snapshot.
+        await sync_to_async(view.check_object_permissions)(view.request, user)
+        return _json_response(view.get_serializer(user).data)
+    except APIException as exc:
+        return _error(exc)
+
+
+@require_safe
+async def my_friends(request):
+    """``UserViewSet.my_friends``"""
+    view = _user_viewset(request, "my_friends", detail=False)
+    try:
+        view.check_permissions(view.request)
+        friends = view.restrict_columns(
+            User.objects.filter(created_by_id=request.user.pk, role=User.FRIEND)
+        )
+        return await _cached_read(
+            request, user_scope(request.user.pk), _page_builder(view, friends)
+        )
+    except APIException as exc:
+        return _error(exc)
+
+
+@require_safe
+async def analytics(request):
+    """``UserViewSet.analytics``"""
+    view = _user_viewset(request, "analytics", detail=False)
+    try:
+        view.check_permissions(view.request)
+    except APIException as exc:
+        return _error(exc)
+    try:
+        queries = analytics_queries(request.GET)
+    except ValueError as exc:
+        return JsonResponse({"detail": str(exc)}, status=400)
+
+    async def build():
+        results = []
+        for query in queries:
+            results.append([row async for row in query])
+        return analytics_payload(*results)
+
+    return await _cached_read(request, ALL_USERS, build, analytics_day())
+
+
+def _validated(serializer_class, request):
+    """``(serializer, None)`` for valid request data, else ``(None, response)``."""
+    data = _request_data(request)
+    if data is None:
+        return None, JsonResponse({"detail": "Malformed JSON"}, status=400)
+    serializer = serializer_class(data=data)
+    if not serializer.is_valid():
+        return None, JsonResponse(serializer.errors, status=400)
+    return serializer, None
+
+
+def _user_viewset(request, action, detail, **kwargs):
+    """
+    A ``UserViewSet`` set up as the router would for ``action``.
+
+    ``AuthMiddleware`` has already authenticated the request, so the DRF
+    request takes its user instead of running the authenticators again.
+    """
+    handler = getattr(UserViewSet, action)
+    view = UserViewSet(
+        **getattr(handler, "kwargs", {}),
+        basename="user",
+        action=action,
+        detail=detail,
+    )
+    view.args, view.kwargs = (), kwargs
+    view.format_kwarg = None
+    view.headers = {}
+    view.request = Request(request, authenticators=())
+    view.request.user = request.user
+    view.request.auth = getattr(request, "auth", None)
+    return view
+
+
+def _page(view, queryset):
+    page = view.paginate_queryset(queryset)
+    return view.get_paginated_response(view.get_serializer(page, many=True).data).data
+
+
+async def _cached_read(request, scope, build, version_suffix=""):
+    """``UserViewSet.cached_read`` for an async ``build``."""
+    version = await aget_scope_version(scope) + version_suffix
+    etag = scope_etag(request, scope, version)
+    response = conditional_response(request, etag)
+    if response is None:
+        key = response_cache_key(
+            request.user.role, await aget_permissions_version(), etag
+        )
+        # Built from the primary, as in the synchronous view.
+        with replica_reads(False):
+            data = await aget_or_build(key, build)
+        response = patch_list_headers(_json_response(data), etag)
+    return response
+
+
+def _page_builder(view, queryset):
+    async def build():
+        return await sync_to_async(_page)(view, queryset)
+
+    return build
+
+
+def _json_response(data):
+    """A 200 response rendered like the synchronous API's JSON."""
+    renderer = FastJSONRenderer()
+    return HttpResponse(renderer.render(data), content_type=renderer.media_type)
+
+
+def _throttled(wait):
+    exc = Throttled(wait)
+    response = _error(exc)
+    response["Retry-After"] = str(exc.wait)
+    return response
+
+
+def _error(exc):
+    detail = exc.detail
+    body = detail if isinstance(detail, (dict, list)) else {"detail": detail}
+    return JsonResponse(body, status=exc.status_code, safe=False)
@@ -1,3 +1,10 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.authentication import BaseAuthentication
@@ -5,27 +12,314 @@ from rest_framework.exceptions import AuthenticationFailed
 
 import jwt
 
+from accounts.cache import cache_is_shared
+from accounts.keyring import get_key_ring
+from accounts.profiling import profiled
+from accounts.sessions import asession_is_current, session_is_current
+from accounts.utils import aget_claims_version, get_claims_version
+
 
 User = get_user_model()
 
 
+class ClaimsUser:
+    """
+    Request principal built from access-token claims.
+
+    Exposes the claims carried by the token (``id``, ``username``, ``email``
+    and ``role``) without touching the database. Any other attribute loads
+    the ``User`` row once and is served from it afterwards.
+    """
+
+    __slots__ = ("id", "username", "email", "role", "_user")
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, username, email, role):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+        self._user = None
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(
+            id=payload["user_id"],
+            username=payload["username"],
+            email=payload["email"],
+            role=payload["role"],
+        )
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def user(self):
+        """The backing ``User`` row, loaded on first use."""
+        if self._user is None:
+            self._user = User.objects.get(pk=self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __copy__(self):
+        clone = ClaimsUser(self.id, self.username, self.email, self.role)
+        clone._user = self._user
+        return clone
+
+    def __eq__(self, other):
+        if isinstance(other, ClaimsUser):
+            return self.id == other.id
+        if isinstance(other, User):
+            return other.pk == self.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.username
+
+    def __repr__(self):
+        return f"<ClaimsUser: {self.username}>"
+
+
+def claims_are_trusted(payload):
+    """
+    Whether a verified access token's claims may stand in for the user row.
+
+    Claims are trusted only while the token is younger than
+    ``JWT_CLAIMS_MAX_AGE`` seconds and its ``ver`` claim still matches the
+    user's current claims version, which is bumped whenever the role or
+    account status changes.
+    """
+    if not _claims_are_fresh(payload):
+        return False
+    return payload["ver"] == get_claims_version(payload["user_id"])
+
+
+async def aclaims_are_trusted(payload):
+    if not _claims_are_fresh(payload):
+        return False
+    return payload["ver"] == await aget_claims_version(payload["user_id"])
+
+
+def _claims_are_fresh(payload):
+    if payload.get("token_type") != "access" or "ver" not in payload:
+        return False
+    max_age = getattr(settings, "JWT_CLAIMS_MAX_AGE", 300)
+    return payload.get("iat", 0) + max_age > time.time()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens that already passed signature verification.
+
+    Entries are keyed by a SHA-256 of the raw token and never outlive the
+    token's ``exp`` claim, so a hit skips both HMAC verification and the
+    user lookup for a short, bounded window.
+    """
+
+    def __init__(self, maxsize=10_000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        key = self.key_for(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload, user = entry
+            if expires_at <= now:
+                self._discard(key, user.pk)
+                return None
+            self._entries.move_to_end(key)
+        # Hand out a copy so per-request attribute writes never leak
+        # between requests sharing the cached instance.
+        return payload, copy.copy(user)
+
+    def set(self, token, payload, user, expires_at=None):
+        if self.maxsize <= 0:
+            return
+        expires_at = min(
+            payload.get("exp", 0),
+            time.time() + self.ttl,
+            expires_at if expires_at is not None else float("inf"),
+        )
+        key = self.key_for(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload, user)
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, (_, _, old_user) = self._entries.popitem(last=False)
+                self._forget(old_key, old_user.pk)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in self._by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _discard(self, key, user_id):
+        self._entries.pop(key, None)
+        self._forget(key, user_id)
+
+    def _forget(self, key, user_id):
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache(
+    maxsize=getattr(settings, "JWT_AUTH_CACHE_SIZE", 10_000),
+    ttl=getattr(settings, "JWT_AUTH_CACHE_TTL", 60),
+)
+
+
+@contextmanager
+def token_errors():
+    """Turn token verification and lookup errors into ``AuthenticationFailed``."""
+    try:
+        yield
+    except AuthenticationFailed:
+        raise
+    except jwt.ExpiredSignatureError:
+        raise AuthenticationFailed("Token has expired")
+    except jwt.InvalidTokenError:
+        raise AuthenticationFailed("Invalid token")
+    except User.DoesNotExist:
+        raise AuthenticationFailed("User not found")
+    except Exception as e:
+        raise AuthenticationFailed(str(e))
+
+
 class JWTAuthentication(BaseAuthentication):
+    """
+    Bearer-token authentication.
+
+    ``authenticate`` serves DRF and the synchronous middleware path;
+    ``aauthenticate`` is its native async twin for ASGI, using the async
+    cache and ORM APIs. Both store their result on the underlying request
+    so a request is authenticated at most once.
+    """
+
     def authenticate(self, request):
+        django_request, auth_header = self._pending(request)
+        if django_request is None:
+            return auth_header
+        result = self.authenticate_header_value(auth_header)
+        django_request._jwt_auth = result
+        return result
+
+    async def aauthenticate(self, request):
+        django_request, auth_header = self._pending(request)
+        if django_request is None:
+            return auth_header
+        result = await self.aauthenticate_header_value(auth_header)
+        django_request._jwt_auth = result
+        return result
+
+    @staticmethod
+    def _pending(request):
+        """
+        ``(django_request, header)`` when the request still needs
+        authenticating, otherwise ``(None, result)``.
+        """
+        # AuthMiddleware may already have authenticated the underlying
+        # HttpRequest; reuse its result instead of decoding again.
+        django_request = getattr(request, "_request", request)
+        cached = getattr(django_request, "_jwt_auth", None)
+        if cached is not None:
+            return None, cached
+
         auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return None
+        if not auth_header or not auth_header.lower().startswith("bearer "):
+            return None, None
+        return django_request, auth_header
 
-        try:
+    def authenticate_header_value(self, auth_header):
+        with token_errors():
             token = auth_header.split(" ")[1]
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user = User.objects.get(id=payload["user_id"])
+
+            hit = token_cache.get(token)
+            if hit is not None:
+                self.check_session(hit[0])
+                return (hit[1], token)
+
+            with profiled("jwt"):
+                payload = get_key_ring().verify(token)
+                self.check_session(payload)
+                if self.use_claims() and claims_are_trusted(payload):
+                    user = self.claims_user(token, payload)
+                else:
+                    user = User.objects.get(id=payload["user_id"])
+                    token_cache.set(token, payload, user)
             return (user, token)
 
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed("Token has expired")
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed("Invalid token")
-        except User.DoesNotExist:
-            raise AuthenticationFailed("User not found")
-        except Exception as e:
-            raise AuthenticationFailed(str(e))
+    async def aauthenticate_header_value(self, auth_header):
+        with token_errors():
+            token = auth_header.split(" ")[1]
+
+            hit = token_cache.get(token)
+            if hit is not None:
+                await self.acheck_session(hit[0])
+                return (hit[1], token)
+
+            with profiled("jwt"):
+                payload = get_key_ring().verify(token)
+                await self.acheck_session(payload)
+                if self.use_claims() and await aclaims_are_trusted(payload):
+                    user = self.claims_user(token, payload)
+                else:
+                    user = await User.objects.aget(id=payload["user_id"])
+                    token_cache.set(token, payload, user)
+            return (user, token)
+
+    @staticmethod
+    def use_claims():
+        # A claims version bumped in one process's private cache would leave
+        # the others trusting the old role.
+        return getattr(settings, "JWT_CLAIMS_PRINCIPAL", False) and cache_is_shared()
+
+    @staticmethod
+    def claims_user(token, payload):
+        user = ClaimsUser.from_payload(payload)
+        max_age = getattr(settings, "JWT_CLAIMS_MAX_AGE", 300)
+        token_cache.set(token, payload, user, payload["iat"] + max_age)
+        return user
+
+    @staticmethod
+    def check_session(payload):
+        """Reject tokens issued before the user's sessions were revoked."""
+        if not session_is_current(payload):
+            raise AuthenticationFailed("Token has been revoked")
+
+    @staticmethod
+    async def acheck_session(payload):
+        if not await asession_is_current(payload):
+            raise AuthenticationFailed("Token has been revoked")
@@ -0,0 +1,265 @@
+import csv
+import json
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from accounts import counters
+from accounts.conditional import ALL_USERS, bump_scope_versions, user_scope
+from accounts.models import User
+from accounts.permissions import ROLE_GROUPS
+from accounts.search import get_search_backend
+from accounts.utils import get_group_id
+
+
+class BulkUserSerializer(serializers.Serializer):
+    """Field validation for one imported row. Uniqueness is checked per batch."""
+
+    username = serializers.RegexField(r"^[\w.@+-]+\Z", max_length=150)
+    password = serializers.CharField(max_length=128)
+    email = serializers.EmailField(required=False, allow_blank=True, default="")
+    first_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True, default=""
+    )
+    last_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True, default=""
+    )
+    role = serializers.ChoiceField(
+        choices=[User.USER, User.FRIEND], required=False, default=User.USER
+    )
+
+
+def read_jsonl(lines):
+    """Yield ``(line_number, row)`` from JSON Lines; bad lines yield an error."""
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = e
+        yield number, row
+
+
+def read_csv(lines):
+    """Yield ``(line_number, row)`` from CSV with a header row."""
+    text = (line.decode("utf-8") if isinstance(line, bytes) else line for line in lines)
+    reader = csv.DictReader(text)
+    for row in reader:
+        yield reader.line_num, row
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def import_workers():
+    return getattr(settings, "BULK_IMPORT_WORKERS", None) or os.cpu_count()
+
+
+def get_import_executor():
+    """
+    Process pool shared by every import in this process.
+
+    Created on first use with ``import_workers()`` processes, so concurrent
+    imports queue for the same workers instead of each forking its own.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=import_workers())
+    return _executor
+
+
+def reset_import_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+class BulkImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        errors = sorted(self.errors, key=lambda error: error["line"])
+        return {"created": self.created, "errors": errors}
+
+
+def _insert(users, batch_size):
+    """
+    Insert ``users`` in one go, falling back to row-by-row savepoints when a
+    concurrent writer claimed one of the usernames.
+
+    Returns ``(created, failed)`` where ``failed`` holds the rejected users.
+    """
+    try:
+        with transaction.atomic():
+            return User.objects.bulk_create(users, batch_size=batch_size), []
+    except IntegrityError:
+        pass
+
+    created, failed = [], []
+    for user in users:
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user])
+            created.append(user)
+        except IntegrityError:
+            failed.append(user)
+    return created, failed
+
+
+class BulkUserImporter:
+    """
+    Create users from an iterable of ``(line_number, row)`` pairs.
+
+    Rows are validated and inserted ``batch_size`` at a time with
+    ``bulk_create``. Passwords are hashed on the shared import pool
+    (``get_import_executor``), or on a pool of its own when ``workers`` is
+    given; 0 or 1 hashes in-process. Friends are attributed to ``created_by_id``,
+    and every user joins the group for its role. Invalid rows are reported
+    per line and do not stop the import.
+    """
+
+    duplicate_error = {"username": ["A user with that username already exists."]}
+
+    def __init__(self, created_by_id=None, batch_size=None, workers=None):
+        self.created_by_id = created_by_id
+        self.batch_size = batch_size or getattr(
+            settings, "BULK_IMPORT_BATCH_SIZE", 1000
+        )
+        self.shared_pool = workers is None
+        self.workers = import_workers() if workers is None else workers
+        self.executor = None
+
+    def run(self, rows):
+        result = BulkImportResult()
+        seen = set()
+        self.group_ids = {
+            role: group_id
+            for role, group_id in (
+                (role, get_group_id(name)) for role, name in ROLE_GROUPS.items()
+            )
+            if group_id is not None
+        }
+
+        rows = iter(rows)
+        own_pool = self.workers > 1 and not self.shared_pool
+        if own_pool:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        elif self.workers > 1:
+            self.executor = get_import_executor()
+        try:
+            while batch := list(islice(rows, self.batch_size)):
+                self.import_batch(batch, result, seen)
+        finally:
+            if own_pool:
+                self.executor.shutdown()
+            self.executor = None
+        return result
+
+    def hash_passwords(self, passwords):
+        if self.executor is None:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self.executor.map(make_password, passwords, chunksize=chunksize))
+
+    def validate(self, batch, result, seen):
+        valid = []
+        for line, row in batch:
+            if not isinstance(row, dict):
+                result.add_error(line, {"non_field_errors": [str(row)]})
+                continue
+            serializer = BulkUserSerializer(data=row)
+            if not serializer.is_valid():
+                result.add_error(line, serializer.errors)
+                continue
+            username = serializer.validated_data["username"]
+            if username in seen:
+                result.add_error(line, {"username": ["Duplicate username in import."]})
+                continue
+            seen.add(username)
+            valid.append((line, serializer.validated_data))
+
+        existing = set(
+            User.objects.filter(
+                username__in=[data["username"] for _, data in valid]
+            ).values_list("username", flat=True)
+        )
+        rows = []
+        for line, data in valid:
+            if data["username"] in existing:
+                result.add_error(line, self.duplicate_error)
+            else:
+                rows.append((line, data))
+        return rows
+
+    def import_batch(self, batch, result, seen):
+        rows = self.validate(batch, result, seen)
+        if not rows:
+            return
+
+        hashes = self.hash_passwords([data["password"] for _, data in rows])
+        users, lines = [], {}
+        for (line, data), password in zip(rows, hashes):
+            users.append(
+                User(
+                    username=data["username"],
+                    password=password,
+                    email=data["email"],
+                    first_name=data["first_name"],
+                    last_name=data["last_name"],
+                    role=data["role"],
+                    created_by_id=(
+                        self.created_by_id if data["role"] == User.FRIEND else None
+                    ),
+                )
+            )
+            lines[data["username"]] = line
+
+        # bulk_create skips post_save, so do the signal handlers' work in bulk.
+        with transaction.atomic():
+            created, failed = _insert(users, self.batch_size)
+            User.groups.through.objects.bulk_create(
+                [
+                    User.groups.through(
+                        user_id=user.pk, group_id=self.group_ids[user.role]
+                    )
+                    for user in created
+                    if user.role in self.group_ids
+                ]
+            )
+            counters.apply_deltas(Counter(user.counter_state() for user in created))
+            get_search_backend().index(created)
+        if created:
+            # New rows can only appear in everyone's list and the importer's.
+            scopes = {ALL_USERS}
+            if self.created_by_id is not None:
+                scopes.add(user_scope(self.created_by_id))
+            bump_scope_versions(scopes)
+
+        for user in failed:
+            result.add_error(lines[user.username], self.duplicate_error)
+        result.created += len(created)
+
+
+def import_users(rows, created_by_id=None, batch_size=None, workers=None):
+    """Shortcut for ``BulkUserImporter(...).run(rows)``."""
+    return BulkUserImporter(created_by_id, batch_size, workers).run(rows)
@@ -0,0 +1,34 @@
+"""
+Whether the Django cache can carry state between worker processes.
+
+Revocation and version counters (sessions, claims, permissions) only work
+across workers when every process reads the same cache. ``LocMemCache`` is
+private to one process and ``DummyCache`` keeps nothing, so with either of
+them the callers fall back to something every worker does see: the database,
+or a short expiry that bounds how long a stale copy can live.
+"""
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """Whether every worker process sees the same ``alias`` cache."""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+def version_timeout(alias=DEFAULT_CACHE_ALIAS):
+    """
+    Expiry for a version token kept in ``alias``.
+
+    Shared versions never expire. A per-process copy lasts at most
+    ``LOCAL_VERSION_TIMEOUT`` seconds, so a change made by another process
+    is picked up within that time.
+    """
+    if cache_is_shared(alias):
+        return None
+    return getattr(settings, "LOCAL_VERSION_TIMEOUT", 30)
@@ -0,0 +1,143 @@
+"""
+ETags and conditional GETs for the user list endpoints.
+
+Every list a client can poll is derived from one *scope*. Admins see
+``ALL_USERS``; everyone else, and every ``my_friends`` list, sees the
+``user_scope`` of the requesting user (their own row plus the users they
+created). Each scope has a version in the Django cache that the User
+signals replace whenever a row in it changes. The ETag hashes that version
+with the request URL and ``Accept`` header, so an unchanged poll is
+answered with 304 after one cache read, before any query or serialization.
+
+Versions are random tokens rather than counters, so an evicted entry
+produces a new version instead of resurrecting one a client already holds.
+The version is read before the list is queried; a write that lands in
+between only makes the next poll fetch the list again. With a per-process
+cache, versions expire after ``LOCAL_VERSION_TIMEOUT`` seconds (see
+``accounts.cache``), so a write made by another worker is reflected in
+ETags, and in the cached responses keyed by them, within that time.
+"""
+
+import hashlib
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag,
+)
+
+from accounts.cache import version_timeout
+from accounts.models import User
+
+ALL_USERS = "all"
+
+# User fields that list responses show, filter or order by, plus
+# ``is_active``, which analytics counts split on. Saves limited to other
+# fields (e.g. ``last_login`` on login) leave the versions alone.
+LISTED_FIELDS = frozenset(
+    {
+        "username",
+        "email",
+        "first_name",
+        "last_name",
+        "role",
+        "is_active",
+        "password",
+        "created_by",
+        "date_joined",
+    }
+)
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def list_scope(user):
+    """The scope of the users ``user`` can list."""
+    return ALL_USERS if user.role == User.ADMIN else user_scope(user.pk)
+
+
+def _scope_version_key(scope):
+    return f"accounts:scope-version:{scope}"
+
+
+def get_scope_version(scope):
+    key = _scope_version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, version_timeout())
+        version = cache.get(key)
+    return version
+
+
+async def aget_scope_version(scope):
+    key = _scope_version_key(scope)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid4().hex, version_timeout())
+        version = await cache.aget(key)
+    return version
+
+
+def bump_scope_versions(scopes):
+    cache.set_many(
+        {_scope_version_key(scope): uuid4().hex for scope in scopes},
+        version_timeout(),
+    )
+
+
+def changed_scopes(user):
+    """
+    Scopes whose lists show ``user``: everyone's, the user's own and their
+    creator's. A creator the row was loaded with is included too, in case
+    the save moved the user to another one.
+    """
+    creators = {user.created_by_id}
+    loaded_state = getattr(user, "_counter_state", None)
+    if loaded_state is not None:
+        creators.add(loaded_state[2])
+    creators.discard(None)
+    return {ALL_USERS, user_scope(user.pk), *map(user_scope, creators)}
+
+
+def scope_etag(request, scope, version):
+    digest = hashlib.sha256(
+        "\n".join(
+            (
+                scope,
+                version,
+                request.build_absolute_uri(),
+                request.headers.get("Accept", ""),
+            )
+        ).encode()
+    )
+    return quote_etag(digest.hexdigest()[:32])
+
+
+def conditional_response(request, etag):
+    """
+    The 304 for a client that already holds ``etag`` (or the 412 for a
+    failed ``If-Match``), else ``None``.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        patch_list_headers(response, etag)
+    return response
+
+
+def patch_list_headers(response, etag):
+    """
+    Mark a user list response as revalidated by ETag on every poll.
+
+    Responses depend on the credentials, so shared caches must not reuse
+    them across users.
+    """
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Authorization", "Accept"))
+    return response
@@ -0,0 +1,112 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+from accounts.models import DailySignupCount, FriendCount, User, UserCount
+
+
+def _increment(model, delta, **key):
+    if not delta:
+        return
+    if model.objects.filter(**key).update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **key)
+    except IntegrityError:
+        # Another writer created the row first; add to theirs.
+        model.objects.filter(**key).update(count=F("count") + delta)
+
+
+def apply_deltas(deltas):
+    """
+    Apply ``{counter_state: delta}`` to the counter tables.
+
+    ``counter_state`` tuples come from ``User.counter_state()``; grouping
+    the deltas first lets bulk writers update each counter row once.
+    """
+    users, signups, friends = Counter(), Counter(), Counter()
+    for (role, is_active, creator_id, day), delta in deltas.items():
+        users[role, is_active] += delta
+        signups[day, role] += delta
+        if creator_id is not None:
+            friends[creator_id] += delta
+
+    for (role, is_active), delta in users.items():
+        _increment(UserCount, delta, role=role, is_active=is_active)
+    for (day, role), delta in signups.items():
+        _increment(DailySignupCount, delta, day=day, role=role)
+    for creator_id, delta in friends.items():
+        _increment(FriendCount, delta, creator_id=creator_id)
+
+
+def record_save(user, created):
+    new_state = user.counter_state()
+    old_state = getattr(user, "_counter_state", None)
+    if created:
+        apply_deltas({new_state: 1})
+    elif old_state is not None and old_state != new_state:
+        apply_deltas({old_state: -1, new_state: 1})
+    # Without a loaded state the previous bucket is unknown; the
+    # reconcile_user_counters command repairs any drift.
+    user._counter_state = new_state
+
+
+def record_delete(user):
+    state = getattr(user, "_counter_state", None) or user.counter_state()
+    apply_deltas({state: -1})
+
+
+@transaction.atomic
+def reconcile():
+    """
+    Rebuild every counter from ``accounts_user``.
+
+    Returns the number of counter rows whose value changed.
+    """
+    expected = {
+        UserCount: {
+            (row["role"], row["is_active"]): row["n"]
+            for row in User.objects.order_by()
+            .values("role", "is_active")
+            .annotate(n=Count("id"))
+        },
+        DailySignupCount: {
+            (row["day"], row["role"]): row["n"]
+            for row in User.objects.order_by()
+            .annotate(day=TruncDate("date_joined"))
+            .values("day", "role")
+            .annotate(n=Count("id"))
+        },
+        FriendCount: {
+            (row["created_by_id"],): row["n"]
+            for row in User.objects.order_by()
+            .filter(role=User.FRIEND, created_by__isnull=False)
+            .values("created_by_id")
+            .annotate(n=Count("id"))
+        },
+    }
+    keys = {
+        UserCount: ("role", "is_active"),
+        DailySignupCount: ("day", "role"),
+        FriendCount: ("creator_id",),
+    }
+
+    changed = 0
+    for model, counts in expected.items():
+        fields = keys[model]
+        current = {
+            row[:-1]: row[-1] for row in model.objects.values_list(*fields, "count")
+        }
+        changed += sum(
+            1
+            for key in current.keys() | counts.keys()
+            if current.get(key, 0) != counts.get(key, 0)
+        )
+        model.objects.all().delete()
+        model.objects.bulk_create(
+            model(count=count, **dict(zip(fields, key))) for key, count in counts.items()
+        )
+    return changed
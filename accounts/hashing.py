@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from accounts.models import User
+
+
+class HashingPoolSaturated(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many concurrent sign-ins, please retry shortly."
+    default_code = "hashing_pool_saturated"
+
+
+class HashingPool:
+    """
+    Bounded executor for password hashing.
+
+    At most ``workers`` hashes run at once and at most ``queue_limit`` more
+    wait for a worker. Anything beyond that is rejected immediately with
+    ``HashingPoolSaturated`` instead of queueing behind a login storm.
+    """
+
+    def __init__(self, workers=4, queue_limit=64, kind="thread"):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.kind = kind
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    executor_class = (
+                        ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+                    )
+                    self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """Run ``fn`` on the pool and block until it finishes."""
+        return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        """Run ``fn`` on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+_pool = None
+
+
+def get_hashing_pool():
+    global _pool
+    if _pool is None:
+        _pool = HashingPool(
+            workers=getattr(settings, "PASSWORD_HASHING_WORKERS", 4),
+            queue_limit=getattr(settings, "PASSWORD_HASHING_QUEUE_LIMIT", 64),
+            kind=getattr(settings, "PASSWORD_HASHING_EXECUTOR", "thread"),
+        )
+    return _pool
+
+
+def _verify(password, encoded):
+    """
+    Pool task: check ``password`` and return ``(valid, upgraded_hash)``.
+
+    With no stored hash, still hash once so unknown usernames cost the
+    same as wrong passwords, as ``ModelBackend`` does.
+    """
+    if encoded is None:
+        make_password(password)
+        return False, None
+    if not check_password(password, encoded):
+        return False, None
+    if identify_hasher(encoded).must_update(encoded):
+        return True, make_password(password)
+    return True, None
+
+
+def _finish(user, result):
+    valid, upgraded_hash = result
+    if not valid or user is None or not user.is_active:
+        return None
+    if upgraded_hash is not None:
+        user.password = upgraded_hash
+        user.save(update_fields=["password"])
+    return user
+
+
+def authenticate_credentials(username, password):
+    """
+    ``ModelBackend``-equivalent authentication with the hash on the pool.
+
+    The user lookup stays on the calling thread; only the hashing moves.
+    """
+    try:
+        user = User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+        user = None
+    result = get_hashing_pool().run(_verify, password, user and user.password)
+    return _finish(user, result)
+
+
+async def aauthenticate_credentials(username, password):
+    try:
+        user = await User._default_manager.aget(**{User.USERNAME_FIELD: username})
+    except User.DoesNotExist:
+        user = None
+    result = await get_hashing_pool().arun(_verify, password, user and user.password)
+    if result[1] is not None:
+        return await sync_to_async(_finish)(user, result)
+    return _finish(user, result)
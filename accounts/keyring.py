@@ -0,0 +1,128 @@
+"""
+JWT signing keys.
+
+Keys come from ``settings.JWT_SIGNING_KEYS``; ``JWT_ACTIVE_KID`` picks the
+one that signs new tokens, and every configured key stays valid for
+verification. Tokens carry the signing key id in their ``kid`` header, so
+rotating is: add the new key, make it active, and remove the old one once
+its tokens have expired.
+
+Each entry is a dict with ``kid``, ``alg`` (``HS256``, ``ES256`` or
+``EdDSA``) and key material: ``secret`` for HS256, ``private_key`` and/or
+``public_key`` PEM strings for asymmetric algorithms. A key with only a
+``public_key`` verifies but cannot sign. Asymmetric algorithms need the
+``cryptography`` package.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+
+class SigningKey:
+    """One parsed key; PEM parsing happens once, here."""
+
+    def __init__(self, kid, algorithm, signing_key=None, verifying_key=None):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+
+    @classmethod
+    def from_config(cls, config):
+        kid = config.get("kid")
+        algorithm_name = config.get("alg")
+        if not kid or not algorithm_name:
+            raise ImproperlyConfigured("JWT_SIGNING_KEYS entries need 'kid' and 'alg'")
+
+        algorithm = get_default_algorithms().get(algorithm_name)
+        if algorithm is None:
+            raise ImproperlyConfigured(
+                f"JWT key {kid!r}: algorithm {algorithm_name!r} is unavailable; "
+                "asymmetric algorithms require the 'cryptography' package"
+            )
+
+        if algorithm_name.startswith("HS"):
+            secret = algorithm.prepare_key(config["secret"])
+            return cls(kid, algorithm_name, secret, secret)
+
+        signing_key = verifying_key = None
+        if config.get("private_key"):
+            signing_key = algorithm.prepare_key(config["private_key"])
+            verifying_key = signing_key.public_key()
+        if config.get("public_key"):
+            verifying_key = algorithm.prepare_key(config["public_key"])
+        if verifying_key is None:
+            raise ImproperlyConfigured(
+                f"JWT key {kid!r} needs a 'private_key' or 'public_key'"
+            )
+        return cls(kid, algorithm_name, signing_key, verifying_key)
+
+    @property
+    def is_public(self):
+        return not self.algorithm.startswith("HS")
+
+    def jwk(self):
+        """Public JWK for asymmetric keys; symmetric secrets are never exported."""
+        if not self.is_public:
+            return None
+        algorithm = get_default_algorithms()[self.algorithm]
+        jwk = algorithm.to_jwk(self.verifying_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeyRing:
+    def __init__(self, keys, active_kid):
+        self.keys = {key.kid: key for key in keys}
+        if active_kid not in self.keys:
+            raise ImproperlyConfigured(f"JWT_ACTIVE_KID {active_kid!r} is not configured")
+        self.active = self.keys[active_kid]
+        if self.active.signing_key is None:
+            raise ImproperlyConfigured(f"JWT key {active_kid!r} cannot sign")
+
+    def sign(self, payload):
+        return jwt.encode(
+            payload,
+            self.active.signing_key,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid},
+        )
+
+    def verify(self, token):
+        """
+        Decode ``token`` with the key named by its ``kid`` header.
+
+        Tokens minted before key ids existed carry no ``kid`` and are
+        checked against the active key.
+        """
+        kid = jwt.get_unverified_header(token).get("kid", self.active.kid)
+        key = self.keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}")
+        return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+    def jwks(self):
+        return {"keys": [jwk for jwk in (key.jwk() for key in self.keys.values()) if jwk]}
+
+
+_key_ring = None
+
+
+def get_key_ring():
+    global _key_ring
+    if _key_ring is None:
+        configs = getattr(settings, "JWT_SIGNING_KEYS", None) or [
+            {"kid": "default", "alg": "HS256", "secret": settings.SECRET_KEY}
+        ]
+        _key_ring = KeyRing(
+            [SigningKey.from_config(config) for config in configs],
+            getattr(settings, "JWT_ACTIVE_KID", configs[0]["kid"]),
+        )
+    return _key_ring
+
+
+def reset_key_ring():
+    global _key_ring
+    _key_ring = None
@@ -0,0 +1,62 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.bulk import BulkUserImporter, read_csv, read_jsonl
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk-create users from a JSON Lines or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=["jsonl", "csv"],
+            help="Input format (default: inferred from the file extension)",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes (default: one per CPU)",
+        )
+        parser.add_argument(
+            "--created-by", help="Username that imported friends are attributed to"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        reader = read_csv if input_format == "csv" else read_jsonl
+
+        created_by_id = None
+        if options["created_by"]:
+            created_by_id = (
+                User.objects.filter(username=options["created_by"])
+                .values_list("id", flat=True)
+                .first()
+            )
+            if created_by_id is None:
+                raise CommandError(f"User {options['created_by']!r} does not exist")
+
+        importer = BulkUserImporter(
+            created_by_id=created_by_id,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+        )
+        if path == "-":
+            result = importer.run(reader(sys.stdin))
+        else:
+            with open(path, newline="", encoding="utf-8") as stream:
+                result = importer.run(reader(stream))
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {result.created} users ({len(result.errors)} rows rejected)"
+            )
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from accounts.sessions import purge_expired_refresh_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete refresh-token records that have expired"
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_refresh_tokens()
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {deleted} expired refresh tokens")
+        )
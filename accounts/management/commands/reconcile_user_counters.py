@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts import counters
+from accounts.conditional import ALL_USERS, bump_scope_versions
+
+
+class Command(BaseCommand):
+    help = "Rebuild the analytics counter tables from accounts_user"
+
+    def handle(self, *args, **options):
+        changed = counters.reconcile()
+        if changed:
+            # Cached analytics responses still show the drifted counts.
+            bump_scope_versions([ALL_USERS])
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled user counters ({changed} rows corrected)")
+        )
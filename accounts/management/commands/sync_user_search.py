@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from accounts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Create and rebuild the user search index"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.setup()
+        backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt user search index ({type(backend).__name__})")
+        )
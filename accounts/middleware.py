@@ -1,70 +1,184 @@
+from functools import partial
+
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import AllowAny
 from accounts.authentication import JWTAuthentication
 from django.http import JsonResponse
-from django.contrib.auth.middleware import AuthenticationMiddleware
-from django.urls import resolve
+from django.contrib.auth.models import AnonymousUser
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+# Public for every HTTP method.
+ALL_METHODS = frozenset({"*"})
+
+
+def auth_exempt(view_func):
+    """Mark a view as public so AuthMiddleware never demands a JWT for it."""
+    view_func.auth_exempt = True
+    return view_func
+
+
+def public_methods(view_func, app_names=()):
+    """
+    HTTP methods for which ``view_func`` is reachable without a JWT.
+
+    Views marked with ``auth_exempt`` and the admin site are public for
+    every method. For DRF viewsets, a method is public when the action it
+    routes to allows ``AllowAny``.
+    """
+    if getattr(view_func, "auth_exempt", False) or "admin" in app_names:
+        return ALL_METHODS
+
+    viewset = getattr(view_func, "cls", None)
+    actions = getattr(view_func, "actions", None)
+    if viewset is None or not actions:
+        return frozenset()
+
+    methods = set()
+    for method, action_name in actions.items():
+        handler = getattr(viewset, action_name, None)
+        permission_classes = getattr(handler, "kwargs", {}).get(
+            "permission_classes",
+            view_func.initkwargs.get("permission_classes", viewset.permission_classes),
+        )
+        if AllowAny in permission_classes:
+            methods.add(method.upper())
+    if "GET" in methods:
+        methods.add("HEAD")
+    return frozenset(methods)
+
+
+def has_bearer(request):
+    return request.headers.get("Authorization", "").lower().startswith("bearer ")
+
+
+def compile_public_routes(urlconf=None):
+    """Map every view callback in ``urlconf`` to its public HTTP methods."""
+    routes = {}
+
+    def walk(patterns, app_names):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(
+                    pattern.url_patterns,
+                    app_names + ((pattern.app_name,) if pattern.app_name else ()),
+                )
+            elif isinstance(pattern, URLPattern):
+                routes[pattern.callback] = public_methods(pattern.callback, app_names)
+
+    walk(get_resolver(urlconf).url_patterns, ())
+    return routes
 
 
 class AuthMiddleware(MiddlewareMixin):
+    """
+    Demand a valid JWT (or session) for every non-public view.
+
+    Works in both handler modes. Under ASGI the request and view hooks run
+    on the event loop without a thread hop, authenticating through
+    ``JWTAuthentication.aauthenticate``.
+    """
 
     def __init__(self, get_response=None):
         super().__init__(get_response)
-        self.django_auth_middleware = None
+        self.jwt_authentication = JWTAuthentication()
+        # Decided once per view callback instead of matching paths on every
+        # request; views from a per-request urlconf are added on first use.
+        self.public_routes = compile_public_routes()
+        if self.async_mode:
+            # The handler adapts process_view by inspecting the bound method.
+            self.process_view = self.aprocess_view
 
     def process_request(self, request):
         """
-        Initial request processing to handle both session and JWT authentication
-        """
+        Make ``request.user`` resolve lazily, and at most once, from the
+        backend the request is using.
 
-        if self.django_auth_middleware is None:
-            self.django_auth_middleware = AuthenticationMiddleware(self.get_response)
-
-        self.django_auth_middleware.process_request(request)
+        Django's ``AuthenticationMiddleware`` (earlier in ``MIDDLEWARE``)
+        has already installed the lazy session user. A request carrying a
+        Bearer token is answered by the JWT alone, so its session is never
+        loaded.
+        """
+        request.auth = None
+        if has_bearer(request):
+            request.user = SimpleLazyObject(partial(self.jwt_user, request))
+            request.auser = partial(self.ajwt_user, request)
+        return None
 
-        if hasattr(request, "user") and request.user.is_authenticated:
-            return None
+    async def __acall__(self, request):
+        self.process_request(request)
+        return await self.get_response(request)
 
-        if not hasattr(request, "user"):
-            request.user = None
-        if not hasattr(request, "auth"):
-            request.auth = None
+    def jwt_user(self, request):
+        try:
+            user_auth_tuple = self.jwt_authentication.authenticate(request)
+        except AuthenticationFailed:
+            user_auth_tuple = None
+        return self._jwt_principal(request, user_auth_tuple)
 
-        return None
+    async def ajwt_user(self, request):
+        try:
+            user_auth_tuple = await self.jwt_authentication.aauthenticate(request)
+        except AuthenticationFailed:
+            user_auth_tuple = None
+        return self._jwt_principal(request, user_auth_tuple)
+
+    @staticmethod
+    def _jwt_principal(request, user_auth_tuple):
+        # A bad token on a public view leaves the request anonymous; protected
+        # views reject it in process_view and DRF re-raises its error.
+        if user_auth_tuple is None:
+            return AnonymousUser()
+        request.auth = user_auth_tuple[1]
+        return user_auth_tuple[0]
+
+    def is_public(self, request, view_func):
+        methods = self.public_routes.get(view_func)
+        if methods is None:
+            match = request.resolver_match
+            methods = self.public_routes[view_func] = public_methods(
+                view_func, match.app_names if match else ()
+            )
+        return methods is ALL_METHODS or request.method in methods
 
     def process_view(self, request, view_func, *view_args, **view_kwargs):
         """Authenticate the request using JWTAuthentication and set request.user."""
 
-        path = request.path_info.rstrip("/")
-
-        skip_auth_paths = [
-            "/admin",
-            "/api/v1/auth/token",
-            "/api/v1/users/register",
-            "/api/v1/auth/refresh_token",
-            "/login",
-            "/register",
-            "/dashboard",
-        ]
-
-        if any(path.startswith(skip_path) for skip_path in skip_auth_paths):
+        if self.is_public(request, view_func):
             return None
 
-        auth = JWTAuthentication()
         try:
+            # Stores the result on the request so DRF's JWTAuthentication
+            # reuses it instead of decoding again. None without a Bearer
+            # header, and only then is the session user loaded.
+            user_auth_tuple = self.jwt_authentication.authenticate(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e)}, status=401)
 
-            if "Authorization" in request.headers:
-                user_auth_tuple = auth.authenticate(request)
-                if user_auth_tuple is not None:
-                    request.user, request.auth = user_auth_tuple
+        if user_auth_tuple is not None:
+            request.user, request.auth = user_auth_tuple
+        elif not request.user.is_authenticated:
+            return JsonResponse({"detail": "Authentication required"}, status=401)
+        return None
 
-            if not any(path.startswith(skip_path) for skip_path in skip_auth_paths):
-                if not request.user or not request.user.is_authenticated:
-                    return JsonResponse(
-                        {"detail": "Authentication required"}, status=401
-                    )
+    async def aprocess_view(self, request, view_func, *view_args, **view_kwargs):
+        """Async ``process_view``; resolves ``request.user`` before the view."""
+        if self.is_public(request, view_func):
+            return None
 
+        try:
+            user_auth_tuple = await self.jwt_authentication.aauthenticate(request)
+            if user_auth_tuple is not None:
+                request.user, request.auth = user_auth_tuple
+            else:
+                # Replace the lazy session user so sync code never has to
+                # load it from the event loop.
+                request.user = await request.auser()
         except AuthenticationFailed as e:
             return JsonResponse({"detail": str(e)}, status=401)
 
+        if not request.user.is_authenticated:
+            return JsonResponse({"detail": "Authentication required"}, status=401)
         return None
@@ -1,6 +1,7 @@
 from typing import Any
 from django.db import models
 from django.contrib.auth.models import AbstractUser, UserManager
+from django.utils import timezone
 
 
 class CustomUserManager(UserManager):
@@ -29,10 +30,38 @@ class User(AbstractUser):
         blank=True,
         on_delete=models.SET_NULL,
         related_name="created_friends",
+        # Covered by user_creator_role_joined_idx, which leads with it.
+        db_index=False,
     )
+    # Bumped to revoke every token issued so far; see accounts.sessions.
+    session_version = models.PositiveIntegerField(default=0)
 
     objects = CustomUserManager()
 
+    # Fields that decide which analytics counters a user is counted in.
+    COUNTER_FIELDS = ("role", "is_active", "created_by_id", "date_joined")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the counted state so post_save can move the user between
+        # counters without re-reading the row. Skipped for deferred loads.
+        if all(name in instance.__dict__ for name in cls.COUNTER_FIELDS):
+            instance._counter_state = instance.counter_state()
+        return instance
+
+    def counter_state(self):
+        """The (role, is_active, creator, signup day) this user is counted under."""
+        joined = self.date_joined
+        if timezone.is_aware(joined):
+            joined = timezone.localtime(joined)
+        return (
+            self.role,
+            self.is_active,
+            self.created_by_id if self.role == self.FRIEND else None,
+            joined.date(),
+        )
+
     def save(self, *args, **kwargs):
         if self.is_superuser:
             self.role = self.ADMIN
@@ -40,8 +69,79 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ["-date_joined"]
+        indexes = [
+            # Admin listing: cursor pagination walks (-date_joined, -id).
+            models.Index(fields=["-date_joined", "-id"], name="user_joined_idx"),
+            # A user's own friends (my_friends, the regular-user scope), in
+            # cursor order.
+            models.Index(
+                fields=["created_by", "role", "-date_joined", "-id"],
+                name="user_creator_role_joined_idx",
+            ),
+            models.Index(fields=["role"], name="user_role_idx"),
+        ]
         permissions = [
             ("can_view_analytics", "Can view analytics"),
             ("can_create_friends", "Can create friend accounts"),
             ("can_manage_own_friends", "Can manage own friend accounts"),
         ]
+
+
+class UserCount(models.Model):
+    """Number of users per role and active flag, maintained by signals."""
+
+    role = models.CharField(max_length=10, choices=User.ROLE_CHOICES)
+    is_active = models.BooleanField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["role", "is_active"], name="unique_user_count"
+            )
+        ]
+
+
+class DailySignupCount(models.Model):
+    """Number of users per role who joined on a given day."""
+
+    day = models.DateField()
+    role = models.CharField(max_length=10, choices=User.ROLE_CHOICES)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day", "role"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "role"], name="unique_daily_signup")
+        ]
+
+
+class FriendCount(models.Model):
+    """Number of friend accounts each user has created."""
+
+    creator = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="friend_count",
+    )
+    count = models.BigIntegerField(default=0)
+
+
+class RefreshToken(models.Model):
+    """
+    Server-side record of an issued refresh token.
+
+    Tokens rotated from the same login share a ``family``. Each token can be
+    exchanged once; presenting a used one again revokes its whole family.
+    """
+
+    jti = models.CharField(max_length=32, primary_key=True)
+    family = models.CharField(max_length=32, db_index=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="refresh_tokens"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+    revoked = models.BooleanField(default=False)
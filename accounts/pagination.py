@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the model's ``-date_joined`` ordering.
+
+    ``-id`` breaks ties between users who joined at the same instant so the
+    page boundaries stay stable.
+    """
+
+    ordering = ("-date_joined", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
@@ -1,5 +1,120 @@
+from uuid import uuid4
+
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from rest_framework import permissions
 
+from accounts.cache import version_timeout
+from accounts.models import User
+from accounts.utils import get_group_id
+
+
+# Group whose permissions each role carries; see
+# ``accounts.signals.create_default_groups_permissions``.
+ROLE_GROUPS = {User.ADMIN: "Admin", User.USER: "User", User.FRIEND: "Friend"}
+
+PERMISSIONS_VERSION_KEY = "accounts:permissions-version"
+
+# Memberships are keyed by the permissions version, which every group change
+# replaces; the timeout only clears out entries under superseded versions.
+MEMBERSHIP_TIMEOUT = 3600
+
+# Snapshot for the current version only: {version: {role: frozenset(perms)}}
+_snapshot = {}
+
+
+def get_permissions_version():
+    """
+    Shared version of the role/permission mapping.
+
+    Versions are random tokens rather than counters, so an evicted cache
+    entry produces a fresh version instead of resurrecting an old snapshot.
+    With a per-process cache the token also expires after a short while
+    (``version_timeout``), bounding how long a change made by another
+    process goes unseen.
+    """
+    version = cache.get(PERMISSIONS_VERSION_KEY)
+    if version is None:
+        cache.add(PERMISSIONS_VERSION_KEY, uuid4().hex, version_timeout())
+        version = cache.get(PERMISSIONS_VERSION_KEY)
+    return version
+
+
+async def aget_permissions_version():
+    version = await cache.aget(PERMISSIONS_VERSION_KEY)
+    if version is None:
+        await cache.aadd(PERMISSIONS_VERSION_KEY, uuid4().hex, version_timeout())
+        version = await cache.aget(PERMISSIONS_VERSION_KEY)
+    return version
+
+
+def bump_permissions_version():
+    cache.set(PERMISSIONS_VERSION_KEY, uuid4().hex, version_timeout())
+
+
+def _build_snapshot():
+    snapshot = {role: set() for role in ROLE_GROUPS}
+    roles_by_group = {group: role for role, group in ROLE_GROUPS.items()}
+    rows = Permission.objects.filter(group__name__in=roles_by_group).values_list(
+        "group__name", "content_type__app_label", "codename"
+    )
+    for group_name, app_label, codename in rows:
+        snapshot[roles_by_group[group_name]].add(f"{app_label}.{codename}")
+    return {role: frozenset(perms) for role, perms in snapshot.items()}
+
+
+def get_role_permissions(role):
+    """
+    Permissions granted to ``role``, resolved from the shared snapshot.
+
+    The snapshot lives in process memory and in the Django cache under the
+    current permissions version, so only the first request after a change
+    touches the database.
+    """
+    version = get_permissions_version()
+    snapshot = _snapshot.get(version)
+    if snapshot is None:
+        cache_key = f"accounts:permissions-snapshot:{version}"
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            snapshot = _build_snapshot()
+            cache.set(cache_key, snapshot, version_timeout())
+        _snapshot.clear()
+        _snapshot[version] = snapshot
+    return snapshot.get(role, frozenset())
+
+
+def get_group_ids(user_id):
+    """Ids of the groups ``user_id`` belongs to, cached per permissions version."""
+    cache_key = f"accounts:user-groups:{get_permissions_version()}:{user_id}"
+    group_ids = cache.get(cache_key)
+    if group_ids is None:
+        group_ids = frozenset(
+            User.groups.through.objects.filter(user_id=user_id).values_list(
+                "group_id", flat=True
+            )
+        )
+        cache.set(cache_key, group_ids, MEMBERSHIP_TIMEOUT)
+    return group_ids
+
+
+def has_role_perm(user, perm):
+    """
+    ``user.has_perm(perm)``, answered from the snapshots when it can be.
+
+    A permission granted by the role's group, to a user who is in that
+    group, needs no query once the user's memberships are cached. Anything
+    else still goes to ``user.has_perm``, which honours superusers, per-user
+    permissions and membership of other groups.
+    """
+    if not user.is_authenticated:
+        return False
+    if perm in get_role_permissions(user.role) and get_group_id(
+        ROLE_GROUPS[user.role]
+    ) in get_group_ids(user.pk):
+        return True
+    return user.has_perm(perm)
+
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -25,7 +140,7 @@ class UserPermission(permissions.BasePermission):
             if request.user.role == "admin":
                 return True
             else:
-                return request.user.has_perm("accounts.can_create_friends")
+                return has_role_perm(request.user, "accounts.can_create_friends")
 
         return True
 
@@ -39,8 +154,8 @@ class UserPermission(permissions.BasePermission):
             return True
 
         # Users can manage friends they created if they have permission
-        if obj.created_by == request.user and request.user.has_perm(
-            "accounts.can_manage_own_friends"
+        if obj.created_by_id == request.user.pk and has_role_perm(
+            request.user, "accounts.can_manage_own_friends"
         ):
             return True
 
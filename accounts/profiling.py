@@ -0,0 +1,231 @@
+"""
+Opt-in per-request profiling.
+
+``ProfilingMiddleware`` samples requests and, for each sampled one, collects
+wall time, DB query count and time, and named sections timed with
+``profiled()`` (JWT decode, permission checks, serialization). Results go
+out as a ``Server-Timing`` header and into an in-process histogram that
+admins read from ``accounts.views.ProfilingView``.
+
+Configured through ``settings.PROFILING``; when disabled the middleware
+removes itself at startup and ``profiled()`` is a shared no-op. Under ASGI
+the middleware runs on the event loop. Queries are timed by a wrapper
+installed on each connection as it opens, which charges them to the
+sampled request whose context they run in, so the async ORM's queries on
+the sync thread are counted too.
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+
+
+_current = ContextVar("accounts_request_profile", default=None)
+_noop = nullcontext()
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open.
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def get_profiling_settings():
+    config = {"ENABLED": False, "SAMPLE_RATE": 1.0, "SERVER_TIMING": True}
+    config.update(getattr(settings, "PROFILING", {}))
+    return config
+
+
+class RequestProfile:
+    __slots__ = ("sections", "queries", "db_time", "total")
+
+    def __init__(self):
+        self.sections = {}
+        self.queries = 0
+        self.db_time = 0.0
+        self.total = 0.0
+
+    def add(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+
+def _time_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - start
+        profile.queries += 1
+
+
+def track_queries(connection, **kwargs):
+    """Charge ``connection``'s queries to the sampled request running them."""
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class _Section:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profile.add(self.name, time.perf_counter() - self.start)
+
+
+def profiled(name):
+    """Context manager timing a named section of the current sampled request."""
+    profile = _current.get()
+    if profile is None:
+        return _noop
+    return _Section(profile, name)
+
+
+class ProfileStore:
+    """Thread-safe per-view histograms of each recorded metric, in ms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, metrics):
+        with self._lock:
+            histograms = self._views.setdefault(view, {})
+            for metric, value in metrics.items():
+                histogram = histograms.get(metric)
+                if histogram is None:
+                    histogram = histograms[metric] = {
+                        "count": 0,
+                        "sum": 0.0,
+                        "buckets": [0] * (len(BUCKETS_MS) + 1),
+                    }
+                histogram["count"] += 1
+                histogram["sum"] += value
+                histogram["buckets"][bisect_left(BUCKETS_MS, value)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: {
+                    metric: {
+                        "count": histogram["count"],
+                        "mean": histogram["sum"] / histogram["count"],
+                        "buckets": dict(
+                            zip(
+                                [f"le_{bound}" for bound in BUCKETS_MS] + ["inf"],
+                                histogram["buckets"],
+                            )
+                        ),
+                    }
+                    for metric, histogram in histograms.items()
+                }
+                for view, histograms in self._views.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Profile sampled requests. Works in both handler modes, so under ASGI it
+    adds no thread hop of its own.
+    """
+
+    def __init__(self, get_response):
+        config = get_profiling_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        connection_created.connect(track_queries, dispatch_uid=__name__)
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.server_timing = config["SERVER_TIMING"]
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    @contextmanager
+    def measure(self):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        # Connections opened before profiling was enabled.
+        for connection in connections.all():
+            track_queries(connection)
+        start = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            profile.total = time.perf_counter() - start
+            _current.reset(token)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        with self.measure() as profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with self.measure() as profile:
+            response = await self.get_response(request)
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile):
+        metrics = {name: seconds * 1000 for name, seconds in profile.sections.items()}
+        metrics["db"] = profile.db_time * 1000
+        metrics["queries"] = profile.queries
+        metrics["total"] = profile.total * 1000
+
+        match = getattr(request, "resolver_match", None)
+        profile_store.record(match.view_name if match else "<unresolved>", metrics)
+
+        if self.server_timing:
+            response["Server-Timing"] = self.format_server_timing(metrics)
+        return response
+
+    @staticmethod
+    def format_server_timing(metrics):
+        entries = []
+        for name, value in metrics.items():
+            if name == "queries":
+                continue
+            entry = f"{name};dur={value:.2f}"
+            if name == "db":
+                entry += f';desc="{metrics["queries"]} queries"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+class ProfiledViewMixin:
+    """Times DRF permission checks as the ``perm`` section."""
+
+    def check_permissions(self, request):
+        with profiled("perm"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with profiled("perm"):
+            super().check_object_permissions(request, obj)
+
@@ -0,0 +1,113 @@
+"""
+JSON renderer and parser that use ``orjson`` when it is installed.
+
+Both fall back to DRF's stdlib implementations when ``orjson`` is missing
+and for requests it cannot answer identically: indented or ASCII-only
+output, lax (NaN-allowing) mode and non-UTF-8 bodies. Datetimes and types
+``orjson`` does not know are handed to DRF's encoder, so the output is the
+same bytes either way.
+
+Large paginated lists can also be streamed: ``iter_render`` encodes the
+``results`` a slice at a time (see ``streamed_list_response``).
+"""
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+else:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+# UTF-8 encodings of U+2028 and U+2029, which JavaScript forbids in strings.
+LINE_SEPARATOR, PARAGRAPH_SEPARATOR = "\u2028".encode(), "\u2029".encode()
+
+
+def get_json_streaming_settings():
+    config = {"MIN_ROWS": 200, "CHUNK_ROWS": 100}
+    config.update(getattr(settings, "JSON_STREAMING", {}))
+    return config
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def uses_orjson(self, indent):
+        return (
+            orjson is not None
+            and indent is None
+            and self.compact
+            and self.strict
+            and not self.ensure_ascii
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if data is None or not self.uses_orjson(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+        )
+        # Keep DRF's guarantee that the output is also valid JavaScript.
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b"\\u2028").replace(
+                PARAGRAPH_SEPARATOR, b"\\u2029"
+            )
+        return ret
+
+    def iter_render(self, data, chunk_rows):
+        """
+        Yield the compact JSON of a paginated ``data`` dict in pieces,
+        encoding its ``results`` ``chunk_rows`` at a time.
+
+        Joined, the pieces equal ``render(data)``; ``results`` must be the
+        last key, as in DRF's paginated responses.
+        """
+        results = data["results"]
+        envelope = self.render({k: v for k, v in data.items() if k != "results"})
+        separator = b"," if len(envelope) > 2 else b""
+        yield envelope[:-1] + separator + b'"results":['
+        for start in range(0, len(results), chunk_rows):
+            chunk = self.render(results[start : start + chunk_rows])[1:-1]
+            yield b"," + chunk if start else chunk
+        yield b"]}"
+
+
+def streamed_list_response(request, data):
+    """
+    A streaming response for a large paginated ``data`` dict, or ``None``
+    when it is small or the negotiated rendering cannot be streamed.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    if (
+        not isinstance(renderer, FastJSONRenderer)
+        or not isinstance(data, dict)
+        or list(data)[-1:] != ["results"]
+        or renderer.get_indent(request.accepted_media_type, {}) is not None
+    ):
+        return None
+    config = get_json_streaming_settings()
+    if len(data["results"]) < config["MIN_ROWS"]:
+        return None
+    return StreamingHttpResponse(
+        renderer.iter_render(data, config["CHUNK_ROWS"]),
+        content_type=renderer.media_type,
+    )
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        utf8 = encoding.lower() in ("utf-8", "utf8")
+        if orjson is None or not self.strict or not utf8:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,101 @@
+"""
+Cache of serialized user list and analytics responses.
+
+Entries are keyed by the ETag of ``accounts.conditional`` (scope version,
+URL and ``Accept``), the requester's role and the permissions version of
+``accounts.permissions``. Nothing is ever deleted: User saves and group
+changes install new versions, and the entries built under the old ones are
+no longer asked for and expire. A friend edit therefore only moves its
+creator's scope, everyone's scope and its own.
+
+When an entry is missing, one request per key rebuilds it under a lock
+taken with ``cache.add``; the others wait for the result up to
+``LOCK_TIMEOUT`` and then build it themselves.
+"""
+
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Pause between checks while another request rebuilds an entry (seconds).
+WAIT_INTERVAL = 0.02
+
+
+def get_response_cache_settings():
+    config = {"ALIAS": "default", "TIMEOUT": 300, "LOCK_TIMEOUT": 5}
+    config.update(getattr(settings, "USER_RESPONSE_CACHE", {}))
+    return config
+
+
+def response_cache_key(role, permissions_version, etag):
+    """Cache key of the response a ``role`` requester is sent as ``etag``."""
+    digest = hashlib.sha256(
+        f"{role}\n{permissions_version}\n{etag}".encode()
+    ).hexdigest()
+    return f"accounts:response:{digest[:32]}"
+
+
+def _cache_and_config():
+    config = get_response_cache_settings()
+    if not config["ALIAS"]:
+        return None, config
+    return caches[config["ALIAS"]], config
+
+
+def get_or_build(key, build):
+    """
+    Cached data for ``key``, calling ``build()`` to produce it on a miss.
+
+    Returns ``build()`` uncached when ``ALIAS`` is empty.
+    """
+    cache, config = _cache_and_config()
+    if cache is None:
+        return build()
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + config["LOCK_TIMEOUT"]
+    while not cache.add(lock_key, 1, config["LOCK_TIMEOUT"]):
+        if time.monotonic() >= deadline:
+            return build()
+        time.sleep(WAIT_INTERVAL)
+        data = cache.get(key)
+        if data is not None:
+            return data
+    try:
+        data = build()
+        cache.set(key, data, config["TIMEOUT"])
+    finally:
+        cache.delete(lock_key)
+    return data
+
+
+async def aget_or_build(key, build):
+    """Async ``get_or_build``; ``build`` is awaited."""
+    cache, config = _cache_and_config()
+    if cache is None:
+        return await build()
+    data = await cache.aget(key)
+    if data is not None:
+        return data
+
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + config["LOCK_TIMEOUT"]
+    while not await cache.aadd(lock_key, 1, config["LOCK_TIMEOUT"]):
+        if time.monotonic() >= deadline:
+            return await build()
+        await asyncio.sleep(WAIT_INTERVAL)
+        data = await cache.aget(key)
+        if data is not None:
+            return data
+    try:
+        data = await build()
+        await cache.aset(key, data, config["TIMEOUT"])
+    finally:
+        await cache.adelete(lock_key)
+    return data
@@ -0,0 +1,176 @@
+from functools import reduce
+import operator
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from accounts.models import User
+
+
+SEARCH_FIELDS = ("username", "email", "first_name", "last_name")
+
+
+class BaseSearchBackend:
+    """
+    Unindexed fallback: every term must ``icontains``-match one of the fields,
+    which is what DRF's ``SearchFilter`` does.
+    """
+
+    fields = SEARCH_FIELDS
+
+    def setup(self):
+        """Create whatever storage the backend needs. Safe to call repeatedly."""
+
+    def rebuild(self):
+        """Re-index every user from scratch."""
+
+    def index(self, users):
+        """Add or refresh the given users in the index."""
+
+    def remove(self, user_ids):
+        """Drop the given user ids from the index."""
+
+    def filter(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(
+                reduce(
+                    operator.or_,
+                    (Q(**{f"{field}__icontains": term}) for field in self.fields),
+                )
+            )
+        return queryset
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 index keyed by the user's primary key.
+
+    Uses the trigram tokenizer, so a term matches anywhere inside a field as
+    with ``icontains``, but is looked up in the index instead of scanning
+    the table. Terms shorter than a trigram fall back to ``icontains``.
+    """
+
+    table = "accounts_user_search"
+    min_term_length = 3
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE name = %s", [self.table]
+            )
+            row = cursor.fetchone()
+            if row is not None and "trigram" in row[0]:
+                return
+            # Missing, or built with word tokens, which only match prefixes.
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {self.table} USING fts5("
+                f"{', '.join(self.fields)}, tokenize='trigram')"
+            )
+        self.rebuild()
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(self.fields)}) "
+                f"SELECT id, {', '.join(self.fields)} FROM {User._meta.db_table}"
+            )
+
+    def index(self, users):
+        rows = [
+            (user.pk, *(getattr(user, field) for field in self.fields))
+            for user in users
+        ]
+        if not rows:
+            return
+        placeholders = ", ".join(["%s"] * (len(self.fields) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, {', '.join(self.fields)}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+
+    def remove(self, user_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(user_id,) for user_id in user_ids],
+            )
+
+    def match_expression(self, terms):
+        phrases = ('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return " AND ".join(phrases)
+
+    def filter(self, queryset, terms):
+        indexed = [term for term in terms if len(term) >= self.min_term_length]
+        short = [term for term in terms if len(term) < self.min_term_length]
+        queryset = super().filter(queryset, short)
+        if not indexed:
+            return queryset
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+                [self.match_expression(indexed)],
+            )
+        )
+
+
+class PostgresTrigramBackend(BaseSearchBackend):
+    """
+    Keeps the ``icontains`` query but backs each field with a ``pg_trgm``
+    GIN index, which Postgres maintains itself.
+    """
+
+    def setup(self):
+        table = User._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for field in self.fields:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{field}_trgm "
+                    f'ON {table} USING gin (UPPER("{field}"::text) gin_trgm_ops)'
+                )
+
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Return the configured search backend.
+
+    ``USER_SEARCH_BACKEND`` may name a backend class; otherwise one is picked
+    to match the database vendor.
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "USER_SEARCH_BACKEND", None)
+        if path:
+            backend_class = import_string(path)
+        elif connection.vendor == "sqlite":
+            backend_class = SQLiteFTSBackend
+        elif connection.vendor == "postgresql":
+            backend_class = PostgresTrigramBackend
+        else:
+            backend_class = BaseSearchBackend
+        _backend = backend_class()
+    return _backend
+
+
+class UserSearchFilter(filters.SearchFilter):
+    """``SearchFilter`` that delegates matching to the user search backend."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend().filter(queryset, terms)
@@ -0,0 +1,169 @@
+"""
+Refresh-token families and per-user session revocation.
+
+Every login starts a refresh-token *family*. Exchanging a refresh token
+marks it used and issues the next one in the same family, so each token
+works exactly once. Presenting a used token again means it was copied,
+and the whole family is revoked along with the user's other sessions.
+
+Revocation is a per-user ``session_version`` counter. Tokens carry the
+version they were issued under in their ``sv`` claim, and access-token
+checks compare it against the copy kept in the Django cache, so revoking
+sessions never adds a database query to ordinary requests. With a shared
+cache the copy never expires. A per-process cache (see ``accounts.cache``)
+never hears about a revocation made by another worker, so there the copy
+expires after ``LOCAL_VERSION_TIMEOUT`` seconds and the column is read again.
+"""
+
+import uuid
+
+import jwt
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.cache import version_timeout
+from accounts.models import RefreshToken, User
+
+
+class RefreshTokenReused(jwt.InvalidTokenError):
+    """A refresh token was presented after it had already been exchanged."""
+
+
+def _session_version_key(user_id):
+    return f"accounts:session-version:{user_id}"
+
+
+def _stored_session_version(user_id):
+    return (
+        User.objects.filter(pk=user_id)
+        .order_by()
+        .values_list("session_version", flat=True)
+    )
+
+
+def get_session_version(user_id):
+    """
+    Current session version of ``user_id``, or ``None`` if the user is gone.
+
+    Served from the cache; a miss reads the column once and stores it for
+    ``version_timeout()``.
+    """
+    key = _session_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _stored_session_version(user_id).first()
+        if version is not None:
+            cache.add(key, version, version_timeout())
+    return version
+
+
+async def aget_session_version(user_id):
+    """Async ``get_session_version``."""
+    key = _session_version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = await _stored_session_version(user_id).afirst()
+        if version is not None:
+            await cache.aadd(key, version, version_timeout())
+    return version
+
+
+def prime_session_version(user):
+    """Cache ``user``'s session version unless another value is already there."""
+    cache.add(
+        _session_version_key(user.pk), user.session_version, version_timeout()
+    )
+
+
+def session_is_current(payload):
+    """Whether a verified token was issued under the user's current version."""
+    return payload.get("sv", 0) == get_session_version(payload["user_id"])
+
+
+async def asession_is_current(payload):
+    return payload.get("sv", 0) == await aget_session_version(payload["user_id"])
+
+
+def new_token_id():
+    return uuid.uuid4().hex
+
+
+def record_refresh_token(user, jti, family, expires_at):
+    return RefreshToken.objects.create(
+        jti=jti, family=family, user_id=user.pk, expires_at=expires_at
+    )
+
+
+def rotate_refresh_token(payload):
+    """
+    Consume the refresh token described by a verified ``payload``.
+
+    Returns the user the next token pair should be issued to. Raises
+    ``RefreshTokenReused`` when the token was already exchanged, after
+    revoking its family and every other session of the user, and
+    ``jwt.InvalidTokenError`` when it is unknown, revoked or stale.
+    """
+    jti = payload.get("jti")
+    if not jti or not session_is_current(payload):
+        raise jwt.InvalidTokenError("Refresh token has been revoked")
+
+    with transaction.atomic():
+        consumed = RefreshToken.objects.filter(
+            jti=jti, used_at__isnull=True, revoked=False
+        ).update(used_at=timezone.now())
+        user = (
+            User.objects.filter(pk=payload["user_id"], is_active=True).first()
+            if consumed
+            else None
+        )
+
+    if not consumed:
+        token = RefreshToken.objects.filter(jti=jti).first()
+        if token is not None and token.used_at is not None and not token.revoked:
+            revoke_user_sessions(token.user_id)
+            raise RefreshTokenReused("Refresh token has already been used")
+        raise jwt.InvalidTokenError("Refresh token has been revoked")
+    if user is None:
+        raise User.DoesNotExist
+    return user
+
+
+def revoke_family(family):
+    """Revoke every refresh token rotated from the same login."""
+    return RefreshToken.objects.filter(family=family, revoked=False).update(
+        revoked=True
+    )
+
+
+async def arevoke_family(family):
+    return await RefreshToken.objects.filter(family=family, revoked=False).aupdate(
+        revoked=True
+    )
+
+
+def revoke_user_sessions(user_id):
+    """
+    Invalidate every access and refresh token issued to ``user_id``.
+
+    Bumps the session version and revokes the stored refresh tokens. The
+    new version is written to the cache straight away so, with a shared
+    cache, other processes start rejecting old access tokens on their next
+    request; without one they see it once their own copy expires.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user_id).update(session_version=F("session_version") + 1)
+        RefreshToken.objects.filter(user_id=user_id, revoked=False).update(revoked=True)
+        version = _stored_session_version(user_id).first()
+    if version is not None:
+        cache.set(_session_version_key(user_id), version, version_timeout())
+    return version
+
+
+def purge_expired_refresh_tokens(now=None):
+    """Delete refresh-token rows that can no longer be exchanged."""
+    deleted, _ = RefreshToken.objects.filter(
+        expires_at__lte=now or timezone.now()
+    ).delete()
+    return deleted
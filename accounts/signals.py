@@ -1,20 +1,140 @@
-from django.db.models.signals import post_migrate, post_save
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+)
+from django.core.signals import setting_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from accounts.authentication import token_cache
+from accounts import counters
+from accounts.bulk import reset_import_executor
+from accounts.conditional import LISTED_FIELDS, bump_scope_versions, changed_scopes
+from accounts.keyring import reset_key_ring
 from accounts.models import User
+from accounts.permissions import bump_permissions_version
+from accounts.search import SEARCH_FIELDS, get_search_backend
+from accounts.throttling import reset_throttle_store
+from accounts.utils import bump_claims_version, clear_group_cache, get_group_id
+
+# Fields copied into access tokens or deciding what a token may do.
+CLAIM_FIELDS = frozenset({"username", "email", "role", "is_active", "is_superuser"})
+
+
+@receiver(post_save, sender=User)
+def ensure_superuser_admin_role(sender, instance, created, update_fields=None, **kwargs):
+    # User.save() already forces role="admin" for superusers; this only
+    # keeps them in the Admin group. Saves that can't have changed
+    # is_superuser (e.g. update_fields=["last_login"]) are skipped.
+    if not instance.is_superuser:
+        return
+    if update_fields is not None and "is_superuser" not in update_fields:
+        return
+
+    admin_group_id = get_group_id("Admin")
+    if admin_group_id is None:
+        return
+    membership = User.groups.through.objects.filter(
+        user_id=instance.pk, group_id=admin_group_id
+    )
+    if created or not membership.exists():
+        instance.groups.add(admin_group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cache(sender, **kwargs):
+    clear_group_cache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_verified_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def bump_user_claims_version(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is None or CLAIM_FIELDS.intersection(update_fields):
+        bump_claims_version(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def bump_deleted_user_claims_version(sender, instance, **kwargs):
+    bump_claims_version(instance.pk)
+
+
+# Connected before update_user_counters, which replaces the loaded counter
+# state that changed_scopes reads the previous creator from.
+@receiver(post_save, sender=User)
+def bump_user_list_versions(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or LISTED_FIELDS.intersection(update_fields):
+        bump_scope_versions(changed_scopes(instance))
+
+
+@receiver(post_delete, sender=User)
+def bump_deleted_user_list_versions(sender, instance, **kwargs):
+    bump_scope_versions(changed_scopes(instance))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_permissions_snapshot(sender, action=None, **kwargs):
+    if action is None or action.startswith("post_"):
+        bump_permissions_version()
+
+
+@receiver(post_save, sender=User)
+def update_user_counters(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        counters.record_save(instance, created)
+
+
+@receiver(post_delete, sender=User)
+def decrement_user_counters(sender, instance, **kwargs):
+    counters.record_delete(instance)
 
 
 @receiver(post_save, sender=User)
-def ensure_superuser_admin_role(sender, instance, created, **kwargs):
-    if instance.is_superuser:
-        if instance.role != "admin":
-            instance.role = "admin"
-            instance.save(update_fields=["role"])
-
-        admin_group = Group.objects.get(name="Admin")
-        if admin_group not in instance.groups.all():
-            instance.groups.add(admin_group)
+def index_user_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(SEARCH_FIELDS).intersection(update_fields):
+        get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=User)
+def remove_user_from_search(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(setting_changed)
+def reload_signing_keys(setting, **kwargs):
+    if setting in ("JWT_SIGNING_KEYS", "JWT_ACTIVE_KID", "SECRET_KEY"):
+        reset_key_ring()
+
+
+@receiver(setting_changed)
+def reload_throttle_store(setting, **kwargs):
+    if setting == "THROTTLING":
+        reset_throttle_store()
+
+
+@receiver(setting_changed)
+def reload_import_executor(setting, **kwargs):
+    # Forked workers keep the settings they started with.
+    if setting in ("BULK_IMPORT_WORKERS", "PASSWORD_HASHERS"):
+        reset_import_executor()
+
+
+@receiver(post_migrate)
+def create_user_search_index(sender, **kwargs):
+    if sender.name == "accounts":
+        get_search_backend().setup()
 
 
 @receiver(post_migrate)
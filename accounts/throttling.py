@@ -0,0 +1,240 @@
+"""
+Token-bucket throttling for the public auth endpoints.
+
+Each throttled *scope* (``login``, ``refresh``, ``register``) can limit
+requests per client IP, per submitted username and for the route as a
+whole, with rates such as ``"10/min"``: a bucket holds that many tokens and
+refills at that rate. Buckets are checked in that order, so one noisy
+client is turned away before it drains the route's shared bucket.
+
+The checks run in DRF's ``check_throttles`` (and at the top of the async
+views), before any serializer, user lookup or password hash, so a rejected
+request costs a dict lookup or a cache round trip.
+
+Stores:
+
+``memory``
+    Per-process buckets, one float per key and no lock (see
+    ``MemoryBucketStore``). Limits apply per worker process.
+``cache``
+    Buckets shared through a Django cache, for multi-worker deployments.
+    Uses only atomic ``add``/``incr`` (see ``CacheBucketStore``).
+"""
+
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def get_throttle_settings():
+    config = {
+        "ENABLED": True,
+        "STORE": "memory",
+        "CACHE_ALIAS": "default",
+        "MAX_KEYS": 100_000,
+        "SCOPES": {},
+    }
+    config.update(getattr(settings, "THROTTLING", {}))
+    return config
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"10/min"`` -> ``(10, 60)``: bucket capacity and refill period in seconds."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """
+    Token buckets held in this process.
+
+    Implemented as GCRA: each key stores only the instant its bucket will be
+    full again, and each token taken moves that instant one refill interval
+    (period / capacity) later. A request is admitted while the instant stays
+    within one period from now. Updates are a read and a dict assignment without a lock, so two
+    threads racing on one key can both be admitted for the last token; a
+    limit is overshot by at most the number of threads.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._full_at = {}
+
+    def consume(self, key, capacity, period):
+        """Take a token; return 0, or the seconds until one is available."""
+        now = time.monotonic()
+        interval = period / capacity
+        full_at = max(self._full_at.get(key, now), now)
+        # Positive once taking a token would push full_at past one period.
+        overdrawn = full_at - now - (period - interval)
+        if overdrawn > 0:
+            return overdrawn
+        self._full_at[key] = full_at + interval
+        if len(self._full_at) > self.max_keys:
+            self._prune(now)
+        return 0
+
+    async def aconsume(self, key, capacity, period):
+        return self.consume(key, capacity, period)
+
+    def _prune(self, now):
+        # A full bucket is the same as no entry. If that frees too little,
+        # drop the oldest keys, which only forgives their clients.
+        for key, full_at in list(self._full_at.items()):
+            if full_at <= now:
+                self._full_at.pop(key, None)
+        for key in list(self._full_at)[: len(self._full_at) - self.max_keys]:
+            self._full_at.pop(key, None)
+
+    def clear(self):
+        self._full_at.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets shared through a Django cache.
+
+    Caches offer no compare-and-set, so each bucket is approximated by a
+    counter per period-long window, created with ``add`` and bumped with
+    ``incr``. The long-run rate is the same; a client can burst up to twice
+    the capacity across a window boundary.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def _window(self, key, period):
+        now = time.time()
+        window = int(now // period)
+        return f"{key}:{window}", (window + 1) * period - now
+
+    def consume(self, key, capacity, period):
+        window_key, remaining = self._window(key, period)
+        if self.cache.add(window_key, 1, period + 1):
+            return 0
+        try:
+            count = self.cache.incr(window_key)
+        except ValueError:
+            # The window expired between add and incr.
+            self.cache.set(window_key, 1, period + 1)
+            return 0
+        return 0 if count <= capacity else remaining
+
+    async def aconsume(self, key, capacity, period):
+        window_key, remaining = self._window(key, period)
+        if await self.cache.aadd(window_key, 1, period + 1):
+            return 0
+        try:
+            count = await self.cache.aincr(window_key)
+        except ValueError:
+            await self.cache.aset(window_key, 1, period + 1)
+            return 0
+        return 0 if count <= capacity else remaining
+
+    def clear(self):
+        # Windows expire on their own; the cache is not ours to clear.
+        pass
+
+
+_store = None
+
+
+def get_throttle_store():
+    global _store
+    if _store is None:
+        config = get_throttle_settings()
+        if config["STORE"] == "cache":
+            _store = CacheBucketStore(config["CACHE_ALIAS"])
+        else:
+            _store = MemoryBucketStore(config["MAX_KEYS"])
+    return _store
+
+
+def reset_throttle_store():
+    global _store
+    _store = None
+
+
+def _buckets(scope, ident, username):
+    """``(key, capacity, period)`` for each bucket a request draws from."""
+    config = get_throttle_settings()
+    if not config["ENABLED"]:
+        return
+    rates = config["SCOPES"].get(scope, {})
+    if isinstance(username, str) and username:
+        # Usernames are at most 150 characters; longer input is not one.
+        username = username.strip().lower()[:150]
+    else:
+        username = None
+    for kind, subject in (("ip", ident), ("username", username), ("route", "")):
+        rate = rates.get(kind)
+        if rate is not None and subject is not None:
+            yield (f"throttle:{scope}:{kind}:{subject}", *parse_rate(rate))
+
+
+def throttle_wait(scope, ident, username=None):
+    """
+    Draw a request's tokens for ``scope``.
+
+    Returns 0 if the request may proceed, else the seconds until it could.
+    """
+    store = get_throttle_store()
+    for key, capacity, period in _buckets(scope, ident, username):
+        wait = store.consume(key, capacity, period)
+        if wait:
+            return wait
+    return 0
+
+
+async def athrottle_wait(scope, ident, username=None):
+    store = get_throttle_store()
+    for key, capacity, period in _buckets(scope, ident, username):
+        wait = await store.aconsume(key, capacity, period)
+        if wait:
+            return wait
+    return 0
+
+
+def client_ident(request):
+    """The client address DRF throttles key on (honours ``NUM_PROXIES``)."""
+    return BaseThrottle().get_ident(request)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle drawing from the buckets configured for ``scope``."""
+
+    scope = None
+
+    def allow_request(self, request, view):
+        self.wait_seconds = throttle_wait(
+            self.scope, self.get_ident(request), self.get_username(request)
+        )
+        return not self.wait_seconds
+
+    def get_username(self, request):
+        return None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginThrottle(TokenBucketThrottle):
+    scope = "login"
+
+    def get_username(self, request):
+        data = request.data
+        return data.get("username") if hasattr(data, "get") else None
+
+
+class RefreshThrottle(TokenBucketThrottle):
+    scope = "refresh"
+
+
+class RegisterThrottle(TokenBucketThrottle):
+    scope = "register"
@@ -1,13 +1,35 @@
 # urls.py
 
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from accounts.views import UserViewSet, AuthViewSet
+from accounts import async_views
+from accounts.views import ProfilingView, UserViewSet, AuthViewSet
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="user")
 router.register(r"auth", AuthViewSet, basename="auth")
 
-urlpatterns = [
+# Native async views, served ahead of the router for ASGI deployments so
+# requests never tie up a thread while they wait.
+async_urlpatterns = [
+    path("auth/token/", async_views.token, name="auth-token"),
+    path("auth/refresh_token/", async_views.refresh_token, name="auth-refresh-token"),
+    path("auth/logout/", async_views.logout, name="auth-logout"),
+    path("auth/jwks/", async_views.jwks, name="auth-jwks"),
+    path("users/", async_views.user_list, name="user-list"),
+    path("users/register/", async_views.register, name="user-register"),
+    path("users/my_friends/", async_views.my_friends, name="user-my-friends"),
+    path("users/analytics/", async_views.analytics, name="user-analytics"),
+    path("users/<int:pk>/", async_views.user_detail, name="user-detail"),
+]
+
+urlpatterns = []
+
+if settings.ASYNC_AUTH_VIEWS:
+    urlpatterns += async_urlpatterns
+
+urlpatterns += [
+    path("profiling/", ProfilingView.as_view(), name="profiling"),
     path("", include(router.urls)),
 ]
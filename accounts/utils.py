@@ -1,28 +1,103 @@
 from datetime import datetime, timedelta
 
-from django.conf import settings
-import jwt
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.utils import timezone
 
+from accounts.keyring import get_key_ring
+from accounts.sessions import (
+    new_token_id,
+    prime_session_version,
+    record_refresh_token,
+)
 
-def generate_tokens(user):
+
+_group_ids = {}
+
+
+def get_group_id(name):
+    """
+    Primary key of the group called ``name``, cached for the process.
+
+    Returns ``None`` if there is no such group. ``clear_group_cache`` runs
+    whenever a group is saved or deleted.
+    """
+    try:
+        return _group_ids[name]
+    except KeyError:
+        group_id = Group.objects.filter(name=name).values_list("id", flat=True).first()
+        if group_id is not None:
+            _group_ids[name] = group_id
+        return group_id
+
+
+def clear_group_cache():
+    _group_ids.clear()
+
+
+def _claims_version_key(user_id):
+    return f"accounts:claims-version:{user_id}"
+
+
+def get_claims_version(user_id):
+    """
+    Current version of the claims embedded in a user's access tokens.
+
+    Only consulted with a shared cache; see ``JWTAuthentication.use_claims``.
+    """
+    return cache.get(_claims_version_key(user_id), 0)
+
+
+async def aget_claims_version(user_id):
+    return await cache.aget(_claims_version_key(user_id), 0)
+
+
+def bump_claims_version(user_id):
+    """Mark every access token issued so far for ``user_id`` as stale."""
+    key = _claims_version_key(user_id)
+    if cache.add(key, 1, None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def generate_tokens(user, family=None):
+    """
+    Issue an access/refresh token pair for ``user``.
+
+    The refresh token is recorded server side as the next member of
+    ``family``; a new family is started when none is given (a fresh login).
+    """
+    jti = new_token_id()
+    family = family or jti
     access_payload = {
         "user_id": user.id,
         "username": user.username,
         "email": user.email,
         "role": user.role,
+        "ver": get_claims_version(user.id),
+        "sv": user.session_version,
         "exp": datetime.now() + timedelta(hours=1),
         "iat": datetime.now(),
         "token_type": "access",
     }
     refresh_payload = {
         "user_id": user.id,
+        "jti": jti,
+        "fam": family,
+        "sv": user.session_version,
         "exp": datetime.now() + timedelta(days=7),
         "iat": datetime.now(),
         "token_type": "refresh",
     }
 
-    access_token = jwt.encode(access_payload, settings.SECRET_KEY, algorithm="HS256")
+    key_ring = get_key_ring()
+    access_token = key_ring.sign(access_payload)
 
-    refresh_token = jwt.encode(refresh_payload, settings.SECRET_KEY, algorithm="HS256")
+    refresh_token = key_ring.sign(refresh_payload)
+    record_refresh_token(user, jti, family, timezone.now() + timedelta(days=7))
+    prime_session_version(user)
 
     return access_token, refresh_token
@@ -1,41 +1,263 @@
 # views.py
 
-from django.conf import settings
+from datetime import timedelta
+
 import jwt
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, status
+from django.conf import settings
+from django.db import connection
 from django.db.models import Q
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.contrib.auth import authenticate
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+from django.utils import timezone
+
+from core.routers import replica_reads
 
-from accounts.models import User
-from accounts.permissions import IsAdminUser, IsRegularUser, UserPermission
+from accounts.bulk import BulkUserImporter, read_csv, read_jsonl
+from accounts.conditional import (
+    ALL_USERS,
+    conditional_response,
+    get_scope_version,
+    list_scope,
+    patch_list_headers,
+    scope_etag,
+    user_scope,
+)
+from accounts.export import export_response, parse_export_params
+from accounts.hashing import authenticate_credentials
+from accounts.keyring import get_key_ring
+from accounts.models import DailySignupCount, FriendCount, User, UserCount
+from accounts.pagination import UserCursorPagination
+from accounts.permissions import (
+    IsAdminUser,
+    IsRegularUser,
+    UserPermission,
+    get_permissions_version,
+)
+from accounts.profiling import (
+    BUCKETS_MS,
+    ProfiledViewMixin,
+    get_profiling_settings,
+    profile_store,
+)
+from accounts.renderers import streamed_list_response
+from accounts.response_cache import get_or_build, response_cache_key
+from accounts.search import SEARCH_FIELDS, UserSearchFilter
+from accounts.sessions import (
+    RefreshTokenReused,
+    revoke_family,
+    revoke_user_sessions,
+    rotate_refresh_token,
+)
 from accounts.serializers import (
     LoginSerializer,
     RegisterSerializer,
+    RowSerializer,
     TokenRefreshSerializer,
     UserSerializer,
 )
+from accounts.throttling import LoginThrottle, RefreshThrottle, RegisterThrottle
 from .utils import generate_tokens
 
 
-class UserViewSet(viewsets.ModelViewSet):
+MAX_ANALYTICS_DAYS = 3650
+MAX_ANALYTICS_TOP = 1000
+MAX_IMPORT_BATCH_SIZE = 10_000
+
+
+def _bounded_int(params, name, default, maximum):
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if not 1 <= value <= maximum:
+        raise ValueError(f"{name} must be between 1 and {maximum}")
+    return value
+
+
+def analytics_queries(params):
+    """
+    The lazy counter queries behind the analytics endpoint.
+
+    ``?days=`` sets the length of the signup series (default 30, at most
+    ``MAX_ANALYTICS_DAYS``) and ``?top=`` the number of creators listed by
+    friend count (default 10, at most ``MAX_ANALYTICS_TOP``). Raises
+    ``ValueError`` with a message for the client if either is invalid.
+    """
+    days = _bounded_int(params, "days", 30, MAX_ANALYTICS_DAYS)
+    top = _bounded_int(params, "top", 10, MAX_ANALYTICS_TOP)
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return (
+        UserCount.objects.values_list("role", "is_active", "count"),
+        DailySignupCount.objects.filter(day__gte=since, count__gt=0).values(
+            "day", "role", "count"
+        ),
+        FriendCount.objects.filter(count__gt=0)
+        .order_by("-count", "creator_id")
+        .values("creator_id", "creator__username", "count")[:top],
+    )
+
+
+def analytics_day():
+    """
+    Suffix for the analytics scope version: the signup series ends today,
+    so cached analytics responses turn over at midnight too.
+    """
+    return f":{timezone.localdate().isoformat()}"
+
+
+def analytics_payload(user_counts, signups, friends_by_creator):
+    """Build the analytics response from the evaluated ``analytics_queries``."""
+    by_role = {role: {"active": 0, "inactive": 0} for role, _ in User.ROLE_CHOICES}
+    for role, is_active, count in user_counts:
+        by_role[role]["active" if is_active else "inactive"] += count
+
+    return {
+        "total_users": sum(sum(counts.values()) for counts in by_role.values()),
+        "total_friends": sum(by_role[User.FRIEND].values()),
+        "by_role": by_role,
+        "signups": signups,
+        "friends_by_creator": [
+            {
+                "creator_id": row["creator_id"],
+                "username": row["creator__username"],
+                "count": row["count"],
+            }
+            for row in friends_by_creator
+        ],
+    }
+
+
+def scope_uses_union():
+    """
+    Whether regular-user lists should scope through a UNION instead of an OR.
+
+    ``USER_SCOPE_UNION`` decides when set. Otherwise only MySQL uses the
+    UNION: it tends to answer the OR with a full scan, while SQLite and
+    PostgreSQL already combine two index seeks for it, and there the UNION
+    only adds a materialised subquery (see ``benchmarks/bench_scope.py``).
+    """
+    setting = getattr(settings, "USER_SCOPE_UNION", None)
+    if setting is not None:
+        return setting
+    return connection.vendor == "mysql"
+
+
+class UserViewSet(ProfiledViewMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, UserPermission]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["username", "email", "first_name", "last_name"]
+    filter_backends = [UserSearchFilter]
+    search_fields = list(SEARCH_FIELDS)
+    pagination_class = UserCursorPagination
+
+    # Columns every list row needs regardless of the requested fields:
+    # the primary key and the cursor ordering keys.
+    list_only_fields = ("id", "date_joined")
+    # Actions whose pages are serialized from value rows by RowSerializer.
+    row_actions = ("list", "my_friends")
+
+    def dispatch(self, request, *args, **kwargs):
+        # Reads of safe requests may be served by a replica (core.routers).
+        with replica_reads(request.method in SAFE_METHODS):
+            return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
         user = self.request.user
         if user.role == "admin":
-            return User.objects.all()
+            queryset = User.objects.all()
         elif user.role == "user":
-            return User.objects.filter(Q(id=user.id) | Q(created_by=user))
+            queryset = self.own_and_friends(user)
         else:
-            return User.objects.filter(id=user.id)
+            queryset = User.objects.filter(id=user.id)
+        return self.restrict_columns(queryset)
+
+    def own_and_friends(self, user):
+        """
+        The user's own row plus the friends they created.
+
+        Detail routes use the plain OR: ``get_object()`` adds the primary
+        key, so the row is found by a single seek and the OR only checks it.
+        Lists use the OR too unless ``scope_uses_union()``, in which case
+        they select ``pk__in`` a UNION of a primary-key lookup and a
+        ``created_by`` index seek. Ordering and pagination always apply to
+        the outer query.
+        """
+        if self.detail or not scope_uses_union():
+            return User.objects.filter(Q(id=user.id) | Q(created_by_id=user.id))
+        ids = (
+            User.objects.filter(pk=user.id)
+            .order_by()
+            .values("pk")
+            .union(User.objects.filter(created_by_id=user.id).order_by().values("pk"))
+        )
+        return User.objects.filter(pk__in=ids)
+
+    def list(self, request, *args, **kwargs):
+        handler = super().list
+        return self.cached_read(
+            list_scope(request.user),
+            lambda: handler(request, *args, **kwargs).data,
+        )
+
+    def cached_read(self, scope, build, version_suffix=""):
+        """
+        Respond with the data ``build()`` returns for ``scope``, unless the
+        client's copy is current (``accounts.conditional``) or the data is
+        already cached (``accounts.response_cache``).
+
+        ``build()`` reads from the primary. Its data is stored under the
+        current scope version, and a lagging replica could still return the
+        rows from before the write that bumped it.
+        """
+        request = self.request
+        version = get_scope_version(scope) + version_suffix
+        etag = scope_etag(request, scope, version)
+        response = conditional_response(request, etag)
+        if response is None:
+            key = response_cache_key(
+                request.user.role, get_permissions_version(), etag
+            )
+            with replica_reads(False):
+                data = get_or_build(key, build)
+            response = streamed_list_response(request, data) or Response(data)
+            patch_list_headers(response, etag)
+        return response
+
+    def list_fields(self):
+        """The fields list rows output: ``?fields=`` or every readable one."""
+        serializer_class = self.get_serializer_class()
+        fields = serializer_class.requested_fields(self.request)
+        return serializer_class.output_fields() if fields is None else fields
+
+    def restrict_columns(self, queryset):
+        """
+        Lists select only the columns they output, as named value rows for
+        ``RowSerializer`` rather than model instances.
+        """
+        if self.action not in self.row_actions:
+            return queryset
+        return queryset.values_list(
+            *self.list_only_fields, *self.list_fields(), named=True
+        )
 
-    @action(detail=False, methods=["post"], permission_classes=[AllowAny])
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.row_actions and kwargs.get("many"):
+            return RowSerializer(
+                self.get_serializer_class(), args[0], self.list_fields()
+            )
+        return super().get_serializer(*args, **kwargs)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[AllowAny],
+        # No authenticators: DRF runs them before the throttle, and Basic
+        # auth would check a password on every unthrottled request.
+        authentication_classes=[],
+        throttle_classes=[RegisterThrottle],
+    )
     def register(self, request):
         """Custom action for user registration"""
         serializer = RegisterSerializer(data=request.data)
@@ -54,26 +276,102 @@ class UserViewSet(viewsets.ModelViewSet):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def bulk_import(self, request):
+        """
+        Admin-only bulk creation from a streamed JSON Lines or CSV body.
+
+        Send ``Content-Type: text/csv`` for CSV with a header row; anything
+        else is read as JSON Lines. ``?batch_size=`` overrides the insert
+        batch size. Friends are attributed to the importing admin.
+        """
+        stream = request.stream
+        if stream is None:
+            return Response(
+                {"detail": "Request body is empty"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        reader = read_csv if request.content_type.startswith("text/csv") else read_jsonl
+        batch_size = None
+        if "batch_size" in request.query_params:
+            try:
+                batch_size = _bounded_int(
+                    request.query_params, "batch_size", None, MAX_IMPORT_BATCH_SIZE
+                )
+            except ValueError as exc:
+                return Response(
+                    {"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+        importer = BulkUserImporter(
+            created_by_id=request.user.pk, batch_size=batch_size
+        )
+        result = importer.run(reader(stream))
+        return Response(
+            result.as_dict(),
+            status=(
+                status.HTTP_201_CREATED
+                if result.created
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Admin-only streaming export of the user table.
+
+        JSON Lines by default, CSV with ``?as=csv``; gzipped when the client
+        accepts it. ``?role=``, ``?joined_after=`` and ``?joined_before=``
+        filter the rows, and ``?after=<id>`` resumes an interrupted download.
+        See ``accounts.export``.
+        """
+        try:
+            export_format, filters = parse_export_params(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return export_response(request, export_format, filters)
+
     def perform_create_friend(self, serializer):
         """Helper method to set the creator of a friend"""
         role = serializer.validated_data.get("role", "user")
-        serializer.save(created_by=self.request.user if role == "friend" else None)
+        serializer.save(
+            created_by_id=self.request.user.id if role == "friend" else None
+        )
 
     @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
     def analytics(self, request):
-        """Custom endpoint for analytics, accessible only by admins"""
-        total_users = User.objects.count()
-        total_friends = User.objects.filter(role="friend").count()
-        return Response({"total_users": total_users, "total_friends": total_friends})
+        """
+        Custom endpoint for analytics, accessible only by admins.
+
+        Reads the signal-maintained counter tables only; see
+        ``analytics_queries`` for the query parameters.
+        """
+        try:
+            queries = analytics_queries(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.cached_read(
+            ALL_USERS,
+            lambda: analytics_payload(*(list(query) for query in queries)),
+            version_suffix=analytics_day(),
+        )
 
     @action(
         detail=False, methods=["get"], permission_classes=[IsRegularUser | IsAdminUser]
     )
     def my_friends(self, request):
         """Endpoint to list friends created by the current user"""
-        friends = User.objects.filter(created_by=request.user, role="friend")
-        serializer = self.get_serializer(friends, many=True)
-        return Response(serializer.data)
+        return self.cached_read(
+            user_scope(request.user.pk), lambda: self.list_friends(request).data
+        )
+
+    def list_friends(self, request):
+        friends = self.restrict_columns(
+            User.objects.filter(created_by_id=request.user.id, role="friend")
+        )
+        page = self.paginate_queryset(friends)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
     def activate_user(self, request, pk=None):
@@ -83,11 +381,18 @@ class UserViewSet(viewsets.ModelViewSet):
         user.save()
         return Response({"status": "user activated"})
 
+    @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
+    def revoke_sessions(self, request, pk=None):
+        """Admin-only endpoint to sign a user out of every session"""
+        user = self.get_object()
+        revoke_user_sessions(user.pk)
+        return Response({"status": "sessions revoked"})
+
     @action(detail=True, methods=["post"], permission_classes=[IsRegularUser])
     def manage_friend(self, request, pk=None):
         """Endpoint for users to manage their friends' settings"""
         friend = self.get_object()
-        if friend.created_by != request.user:
+        if friend.created_by_id != request.user.id:
             return Response(
                 {"detail": "You do not have permission to manage this friend"},
                 status=403,
@@ -96,18 +401,21 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response({"status": "friend settings updated"})
 
 
-class AuthViewSet(viewsets.ViewSet):
+class AuthViewSet(ProfiledViewMixin, viewsets.ViewSet):
+    # Credentials come in the body. Authenticators run before the throttles,
+    # so a Basic header here would buy an unthrottled password check.
+    authentication_classes = []
     permission_classes = [AllowAny]
 
-    @action(detail=False, methods=["post"])
+    @action(detail=False, methods=["post"], throttle_classes=[LoginThrottle])
     def token(self, request):
         """Endpoint to obtain JWT tokens"""
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user = authenticate(
-            username=serializer.validated_data["username"],
-            password=serializer.validated_data["password"],
+        user = authenticate_credentials(
+            serializer.validated_data["username"],
+            serializer.validated_data["password"],
         )
 
         if not user:
@@ -129,40 +437,97 @@ class AuthViewSet(viewsets.ViewSet):
             }
         )
 
-    @action(detail=False, methods=["post"])
+    @action(detail=False, methods=["get"])
+    def jwks(self, request):
+        """Public keys for verifying our tokens without calling back here"""
+        return Response(
+            get_key_ring().jwks(), headers={"Cache-Control": "public, max-age=300"}
+        )
+
+    @action(detail=False, methods=["post"], throttle_classes=[RefreshThrottle])
     def refresh_token(self, request):
-        """Endpoint to refresh JWT tokens"""
+        """
+        Exchange a refresh token for a new token pair.
+
+        Each refresh token works once. Presenting one that was already
+        exchanged revokes every session of its user.
+        """
         serializer = TokenRefreshSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        try:
-            refresh_token = serializer.validated_data["refresh_token"]
-            print("Received refresh token:", refresh_token)
-            payload = jwt.decode(
-                refresh_token, settings.SECRET_KEY, algorithms=["HS256"]
-            )
-
-            if payload.get("token_type") != "refresh":
-                raise jwt.InvalidTokenError("Not a refresh token")
-
-            user = User.objects.get(id=payload["user_id"])
-            access_token, new_refresh_token = generate_tokens(user)
+        body, code = exchange_refresh_token(serializer.validated_data["refresh_token"])
+        return Response(body, status=code)
 
-            return Response(
-                {"access_token": access_token, "refresh_token": new_refresh_token}
-            )
+    @action(detail=False, methods=["post"])
+    def logout(self, request):
+        """Revoke the refresh-token family the given token belongs to"""
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        except jwt.ExpiredSignatureError:
-            return Response(
-                {"error": "Refresh token has expired"},
-                status=status.HTTP_401_UNAUTHORIZED,
-            )
-        except jwt.InvalidTokenError as e:
-            print("Invalid token error:", str(e))
+        family = refresh_token_family(serializer.validated_data["refresh_token"])
+        if family is None:
             return Response(
                 {"error": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED
             )
-        except User.DoesNotExist:
-            return Response(
-                {"error": "User does not exist"}, status=status.HTTP_401_UNAUTHORIZED
-            )
+        revoke_family(family)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def exchange_refresh_token(refresh_token):
+    """
+    Rotate ``refresh_token`` into a new token pair.
+
+    Returns the response body and status code; shared by the sync and async
+    refresh endpoints.
+    """
+    try:
+        payload = get_key_ring().verify(refresh_token)
+
+        if payload.get("token_type") != "refresh":
+            raise jwt.InvalidTokenError("Not a refresh token")
+
+        user = rotate_refresh_token(payload)
+        access_token, new_refresh_token = generate_tokens(user, family=payload["fam"])
+
+        return (
+            {"access_token": access_token, "refresh_token": new_refresh_token},
+            status.HTTP_200_OK,
+        )
+
+    except jwt.ExpiredSignatureError:
+        return {"error": "Refresh token has expired"}, status.HTTP_401_UNAUTHORIZED
+    except RefreshTokenReused:
+        return (
+            {"error": "Refresh token has already been used"},
+            status.HTTP_401_UNAUTHORIZED,
+        )
+    except jwt.InvalidTokenError:
+        return {"error": "Invalid refresh token"}, status.HTTP_401_UNAUTHORIZED
+    except User.DoesNotExist:
+        return {"error": "User does not exist"}, status.HTTP_401_UNAUTHORIZED
+
+
+def refresh_token_family(refresh_token):
+    """The family of a valid refresh token, or ``None``."""
+    try:
+        payload = get_key_ring().verify(refresh_token)
+    except jwt.InvalidTokenError:
+        return None
+    if payload.get("token_type") != "refresh":
+        return None
+    return payload.get("fam")
+
+
+class ProfilingView(APIView):
+    """Admin-only dump of the aggregated request profiling histograms"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "sample_rate": get_profiling_settings()["SAMPLE_RATE"],
+                "buckets_ms": BUCKETS_MS,
+                "views": profile_store.snapshot(),
+            }
+        )
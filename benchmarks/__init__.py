@@ -0,0 +1,152 @@
+"""
+Standalone benchmarks for the accounts API.
+
+Each ``bench_*`` module is runnable with ``python -m benchmarks.bench_<name>``
+from the project root. They build a throwaway test database, so they never
+touch ``db.sqlite3``.
+"""
+
+import os
+import statistics
+import time
+
+
+def setup_django():
+    """Configure Django and create an isolated test database."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import django
+    from django.test.utils import setup_databases, setup_test_environment
+
+    django.setup()
+    setup_test_environment()
+    return setup_databases(verbosity=0, interactive=False)
+
+
+def seed_users(total, batch_size=10_000):
+    """Top the user table up to ``total`` rows with ``bulk_create``."""
+    from django.contrib.auth.hashers import make_password
+
+    from accounts.models import User
+
+    password = make_password("password123")
+    existing = User.objects.count()
+    batch = []
+    for n in range(existing, total):
+        batch.append(
+            User(username=f"seed{n}", email=f"seed{n}@example.com", password=password)
+        )
+        if len(batch) == batch_size:
+            User.objects.bulk_create(batch)
+            batch = []
+    User.objects.bulk_create(batch)
+
+
+def seed_population(users, friends_per_user=0, batch_size=5_000):
+    """
+    Seed ``users`` regular users, each with ``friends_per_user`` friends.
+
+    Rows come from the test-suite factories but are written with
+    ``bulk_create``, so signals do not run; group memberships, the
+    analytics counters and the search index are rebuilt in bulk instead.
+    Every seeded account has the password ``password123``. Returns the
+    regular users.
+    """
+    import logging
+
+    from django.contrib.auth.hashers import make_password
+
+    from accounts import counters
+    from accounts.models import User
+    from accounts.permissions import ROLE_GROUPS
+    from accounts.search import get_search_backend
+    from accounts.utils import get_group_id
+
+    # factory_boy and Faker log every value they generate at DEBUG.
+    for name in ("factory", "faker"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    from tests.factories import FriendUserFactory, RegularUserFactory
+
+    password = make_password("password123")
+
+    def build(factory, count, **kwargs):
+        # password=None skips the per-row PBKDF2 run of the factory.
+        members = factory.build_batch(count, password=None, **kwargs)
+        for member in members:
+            member.password = password
+        return members
+
+    regulars = []
+    for start in range(0, users, batch_size):
+        regulars += User.objects.bulk_create(
+            build(RegularUserFactory, min(batch_size, users - start))
+        )
+
+    friends = []
+    for creator in regulars:
+        friends += build(FriendUserFactory, friends_per_user, created_by=creator)
+        if len(friends) >= batch_size:
+            User.objects.bulk_create(friends)
+            friends = []
+    User.objects.bulk_create(friends)
+
+    Membership = User.groups.through
+    group_ids = {role: get_group_id(name) for role, name in ROLE_GROUPS.items()}
+    memberships = (
+        Membership(user_id=user_id, group_id=group_ids[role])
+        for user_id, role in User.objects.filter(groups=None).values_list("id", "role")
+        if group_ids.get(role)
+    )
+    Membership.objects.bulk_create(memberships, batch_size=batch_size)
+
+    counters.reconcile()
+    get_search_backend().rebuild()
+    return regulars
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def count_queries(func):
+    """Run ``func`` once and return the number of SQL queries it issued."""
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    # DEBUG keeps a bounded query log; once it is full the capture window
+    # would always look empty, so start from a clean log.
+    reset_queries()
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    return len(ctx.captured_queries)
+
+
+def measure(func, iterations):
+    """
+    Call ``func`` repeatedly and return latency stats in milliseconds.
+
+    ``rps`` is the sequential throughput implied by the mean latency.
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    mean = statistics.fmean(samples)
+    return {
+        "mean": mean,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "rps": 1000 / mean if mean else float("inf"),
+    }
+
+
+def report(label, stats, **extra):
+    fields = " ".join(f"{key}={value}" for key, value in extra.items())
+    print(
+        f"{label:<40} mean={stats['mean']:.3f}ms p50={stats['p50']:.3f}ms "
+        f"p95={stats['p95']:.3f}ms p99={stats['p99']:.3f}ms {fields}".rstrip()
+    )
@@ -0,0 +1,314 @@
+"""
+End-to-end benchmark of the auth and user APIs with a regression gate.
+
+    python -m benchmarks.bench_api [--transport inprocess|asgi|wsgi|all]
+                                   [--users N] [--friends N] [--iterations N]
+                                   [--update-baseline] [--tolerance 0.25]
+
+Seeds ``--users`` regular users with ``--friends`` friends each, then drives
+login, refresh, the user list, ``my_friends``, analytics and search through
+one or more transports:
+
+``inprocess``
+    Django's WSGI handler called directly through the test client.
+``asgi``
+    Django's ASGI handler through the async test client.
+``wsgi``
+    A real threaded WSGI server on localhost, spoken to over HTTP.
+
+Each scenario reports latency percentiles, sequential throughput and SQL
+queries per request. Results are compared against ``baseline.json`` next to
+this file: the run fails when a scenario issues more queries than the
+baseline or its p50 is more than ``--tolerance`` slower. Refresh the
+baseline with ``--update-baseline`` after intended changes, on the machine
+that runs the check.
+"""
+
+import argparse
+import http.client
+import json
+import sys
+from pathlib import Path
+
+from benchmarks import count_queries, measure, report, seed_population, setup_django
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+TRANSPORTS = ("inprocess", "asgi", "wsgi")
+
+# Logins hash a password each time, so they run far fewer iterations.
+SLOW_SCENARIOS = {"token": 10}
+
+
+class InProcessTransport:
+    """Requests through Django's WSGI handler without a socket."""
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client()
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            headers=headers,
+        )
+        return response.status_code, response.content
+
+    def close(self):
+        pass
+
+
+class ASGITransport(InProcessTransport):
+    """Requests through Django's ASGI handler."""
+
+    def __init__(self):
+        import logging
+
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+
+        # Every call runs on a new event loop, which asyncio logs at DEBUG.
+        logging.getLogger("asyncio").setLevel(logging.WARNING)
+
+        self.client = AsyncClient()
+
+        async def generic(*args, **kwargs):
+            return await self.client.generic(*args, **kwargs)
+
+        self.generic = async_to_sync(generic)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.generic(
+            method,
+            path,
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            headers=headers,
+        )
+        return response.status_code, response.content
+
+
+class WSGIServerTransport:
+    """Requests over HTTP to a threaded WSGI server on an ephemeral port."""
+
+    def __init__(self):
+        from django.db import connections
+        from django.test.testcases import LiveServerThread, QuietWSGIRequestHandler
+
+        class RequestHandler(QuietWSGIRequestHandler):
+            # Headers and body are written separately; with Nagle on, every
+            # response waits for a delayed ACK and measures ~40ms.
+            disable_nagle_algorithm = True
+
+        class ServerThread(LiveServerThread):
+            def _create_server(self, connections_override=None):
+                server = super()._create_server(connections_override)
+                server.RequestHandlerClass = RequestHandler
+                return server
+
+        # The in-memory test database only exists on this thread's
+        # connection, so the server thread has to share it, exactly as
+        # LiveServerTestCase does. This also lets count_queries see the
+        # server's queries.
+        self.shared = [
+            conn
+            for conn in connections.all()
+            if conn.vendor == "sqlite" and conn.is_in_memory_db()
+        ]
+        for conn in self.shared:
+            conn.inc_thread_sharing()
+        self.server = ServerThread(
+            "localhost",
+            lambda handler: handler,
+            connections_override={conn.alias: conn for conn in self.shared},
+        )
+        self.server.daemon = True
+        self.server.start()
+        self.server.is_ready.wait()
+        if self.server.error:
+            raise self.server.error
+        self.connection = http.client.HTTPConnection("localhost", self.server.port)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(data) if data is not None else None
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, response.read()
+
+    def close(self):
+        self.connection.close()
+        self.server.terminate()
+        for conn in self.shared:
+            conn.dec_thread_sharing()
+
+
+def make_transport(name):
+    return {
+        "inprocess": InProcessTransport,
+        "asgi": ASGITransport,
+        "wsgi": WSGIServerTransport,
+    }[name]()
+
+
+def call(transport, method, path, data=None, token=None):
+    status, body = transport.request(method, path, data, token)
+    if status != 200:
+        raise RuntimeError(f"{method} {path} returned {status}: {body[:200]!r}")
+    return json.loads(body)
+
+
+def login(transport, username):
+    from django.urls import reverse
+
+    return call(
+        transport,
+        "POST",
+        reverse("auth-token"),
+        {"username": username, "password": "password123"},
+    )
+
+
+def build_scenarios(transport, admin, regular):
+    """Map each scenario name to a zero-argument request function."""
+    from django.urls import reverse
+
+    admin_token = login(transport, admin.username)["access_token"]
+    user_token = login(transport, regular.username)["access_token"]
+    state = {"refresh_token": login(transport, regular.username)["refresh_token"]}
+
+    def refresh():
+        # Refresh tokens are single use, so each call spends the last one.
+        tokens = call(
+            transport,
+            "POST",
+            reverse("auth-refresh-token"),
+            {"refresh_token": state["refresh_token"]},
+        )
+        state["refresh_token"] = tokens["refresh_token"]
+
+    return {
+        "token": lambda: login(transport, regular.username),
+        "refresh": refresh,
+        "list": lambda: call(transport, "GET", reverse("user-list"), token=admin_token),
+        "my_friends": lambda: call(
+            transport, "GET", reverse("user-my-friends"), token=user_token
+        ),
+        "analytics": lambda: call(
+            transport, "GET", reverse("user-analytics"), token=admin_token
+        ),
+        "search": lambda: call(
+            transport,
+            "GET",
+            reverse("user-list") + f"?search={regular.first_name[:3]}",
+            token=admin_token,
+        ),
+    }
+
+
+def run(transports, iterations):
+    """Benchmark every scenario over ``transports`` and return the results."""
+    from accounts.models import User
+
+    admin = User.objects.create_superuser("bench-admin", None, "password123")
+    regular = User.objects.filter(role=User.USER).first()
+
+    results = {}
+    for name in transports:
+        transport = make_transport(name)
+        try:
+            for scenario, func in build_scenarios(transport, admin, regular).items():
+                func()  # warm up caches before measuring
+                queries = count_queries(func)
+                stats = measure(func, SLOW_SCENARIOS.get(scenario, iterations))
+                key = f"{name}:{scenario}"
+                report(key, stats, rps=f"{stats['rps']:.1f}", queries=queries)
+                results[key] = {
+                    "p50": round(stats["p50"], 3),
+                    "p95": round(stats["p95"], 3),
+                    "p99": round(stats["p99"], 3),
+                    "rps": round(stats["rps"], 1),
+                    "queries": queries,
+                }
+        finally:
+            transport.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a description of every regression against ``baseline``."""
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if result["queries"] > expected["queries"]:
+            regressions.append(
+                f"{key}: {result['queries']} queries (baseline {expected['queries']})"
+            )
+        if result["p50"] > expected["p50"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: p50 {result['p50']:.3f}ms (baseline {expected['p50']:.3f}ms)"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transport", choices=(*TRANSPORTS, "all"), default="all")
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--friends", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    seed_population(args.users, args.friends)
+
+    from django.test.utils import override_settings
+
+    # Every scenario repeats one client's requests far past the login and
+    # refresh limits; measure the endpoints, not the 429s.
+    override_settings(THROTTLING={"ENABLED": False}).enable()
+
+    transports = TRANSPORTS if args.transport == "all" else (args.transport,)
+    results = run(transports, args.iterations)
+    config = {"users": args.users, "friends": args.friends}
+
+    if args.update_baseline:
+        stored = (
+            json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        )
+        if stored.get("config") != config:
+            stored = {"config": config, "results": {}}
+        stored["results"].update(results)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != config:
+        print(f"Baseline was recorded with {baseline.get('config')}, not {config}")
+        return 2
+
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Queries and latency per authenticated request, with and without the
+verified-token cache.
+
+    python -m benchmarks.bench_auth [iterations]
+"""
+
+import sys
+
+from benchmarks import count_queries, measure, report, setup_django
+
+
+def main(iterations=500):
+    setup_django()
+
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from accounts.authentication import token_cache
+    from accounts.models import User
+    from accounts.utils import generate_tokens
+
+    user = User.objects.create_user("bench", "bench@example.com", "password123")
+    access_token, _ = generate_tokens(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    url = reverse("user-list")
+
+    def request():
+        client.get(url)
+
+    for label, maxsize in (("token cache disabled", 0), ("token cache enabled", 10_000)):
+        token_cache.clear()
+        token_cache.maxsize = maxsize
+        request()
+        queries = count_queries(request)
+        report(label, measure(request, iterations), queries=queries)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,142 @@
+"""
+Concurrent read/write throughput of each database profile.
+
+    python -m benchmarks.bench_database [profiles...] [--threads N]
+                                        [--seconds N] [--write-ratio F]
+
+Profiles are ``DB_PROFILE`` values (see ``core/settings.py``) and default to
+``sqlite-basic`` and ``sqlite``. Each profile runs in a child process against
+a fresh temporary SQLite file; the ``postgres`` profile uses the configured
+server, so point ``DB_NAME`` at a scratch database. Worker threads mix user
+list reads with the writes ``register`` and ``activate_user`` issue, and
+every failed operation (typically "database is locked") is counted.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import percentile
+
+
+def worker(deadline, write_ratio, results, lock):
+    from django.db import OperationalError, connection, transaction
+
+    from accounts.models import User
+
+    rng = random.Random()
+    reads, writes, errors = [], [], 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                with transaction.atomic():
+                    if rng.random() < 0.5:
+                        name = f"bench-{threading.get_ident()}-{len(writes)}"
+                        User.objects.create(username=name, password="!")
+                    else:
+                        user = User.objects.order_by("?").first()
+                        user.is_active = not user.is_active
+                        user.save()
+                writes.append((time.perf_counter() - start) * 1000)
+            else:
+                list(User.objects.only("id", "username", "email", "role")[:50])
+                reads.append((time.perf_counter() - start) * 1000)
+        except OperationalError:
+            errors += 1
+    connection.close()
+    with lock:
+        results["reads"] += reads
+        results["writes"] += writes
+        results["errors"] += errors
+
+
+def run_profile(threads, seconds, write_ratio):
+    """Child process: benchmark the profile selected by the environment."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+    from benchmarks import seed_users
+
+    seed_users(1_000)
+
+    results = {"reads": [], "writes": [], "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    pool = [
+        threading.Thread(target=worker, args=(deadline, write_ratio, results, lock))
+        for _ in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    summary = {"ops_per_s": (len(results["reads"]) + len(results["writes"])) / seconds}
+    for kind in ("reads", "writes"):
+        samples = results[kind] or [0.0]
+        summary[kind] = {
+            "count": len(results[kind]),
+            "p50": percentile(samples, 50),
+            "p99": percentile(samples, 99),
+        }
+    summary["errors"] = results["errors"]
+    print(json.dumps(summary))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("profiles", nargs="*", default=["sqlite-basic", "sqlite"])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_profile(args.threads, args.seconds, args.write_ratio)
+        return
+
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "DB_PROFILE": profile}
+            if profile != "postgres":
+                env["DB_NAME"] = os.path.join(tmp, "bench.sqlite3")
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_database",
+                    "--child",
+                    f"--threads={args.threads}",
+                    f"--seconds={args.seconds}",
+                    f"--write-ratio={args.write_ratio}",
+                ],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        summary = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{profile:<14} {summary['ops_per_s']:8.1f} ops/s  "
+            f"reads p50={summary['reads']['p50']:.2f}ms "
+            f"p99={summary['reads']['p99']:.2f}ms  "
+            f"writes p50={summary['writes']['p50']:.2f}ms "
+            f"p99={summary['writes']['p99']:.2f}ms  "
+            f"errors={summary['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
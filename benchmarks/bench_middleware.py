@@ -0,0 +1,71 @@
+"""
+Per-request cost of AuthMiddleware's public-route decision as the number of
+routes grows, against the path-prefix scan it replaced.
+
+    python -m benchmarks.bench_middleware [route counts...]
+"""
+
+import sys
+import timeit
+import types
+
+from benchmarks import setup_django
+
+
+def legacy_is_public(path, prefixes):
+    path = path.rstrip("/")
+    return any(path.startswith(prefix) for prefix in list(prefixes))
+
+
+def build_urlconf(count):
+    from django.http import HttpResponse
+    from django.urls import path
+
+    from accounts.middleware import auth_exempt
+
+    urlconf = types.ModuleType(f"bench_urls_{count}")
+    urlconf.urlpatterns = []
+    for n in range(count):
+        view = lambda request: HttpResponse()  # noqa: E731
+        if n % 2:
+            view = auth_exempt(view)
+        urlconf.urlpatterns.append(path(f"route{n:06d}/", view))
+    return urlconf
+
+
+def main(*counts):
+    setup_django()
+
+    from django.test import RequestFactory
+
+    from accounts.middleware import AuthMiddleware, compile_public_routes
+
+    middleware = AuthMiddleware(lambda request: None)
+    number = 20_000
+    for count in counts or (10, 100, 1_000, 10_000):
+        urlconf = build_urlconf(count)
+        middleware.public_routes = compile_public_routes(urlconf)
+        prefixes = [f"/route{n:06d}" for n in range(1, count, 2)]
+
+        # The prefix scan's worst case is a protected path (no prefix
+        # matches); the compiled lookup costs the same for every route.
+        protected = RequestFactory().get("/route000000/")
+        last = urlconf.urlpatterns[-1 if count % 2 == 0 else -2]
+        request = RequestFactory().get(f"/{last.pattern}")
+        request.resolver_match = None
+
+        legacy = timeit.timeit(
+            lambda: legacy_is_public(protected.path_info, prefixes), number=number
+        )
+        compiled = timeit.timeit(
+            lambda: middleware.process_view(request, last.callback, (), {}),
+            number=number,
+        )
+        print(
+            f"{count:>6} routes  prefix scan {legacy / number * 1e6:8.2f}us  "
+            f"compiled lookup {compiled / number * 1e6:6.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
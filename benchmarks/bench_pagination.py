@@ -0,0 +1,57 @@
+"""
+Latency and peak memory of the admin user list as the table grows.
+
+    python -m benchmarks.bench_pagination [sizes...]
+
+Defaults to 10k, 100k and 1M users; each size seeds on top of the previous
+one. ``fields=username`` shows the effect of sparse fieldsets.
+"""
+
+import sys
+import tracemalloc
+
+from benchmarks import measure, report, seed_users, setup_django
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(*sizes):
+    setup_django()
+
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from accounts.models import User
+    from accounts.utils import generate_tokens
+
+    admin = User.objects.create_superuser("bench-admin", None, "password123")
+    access_token, _ = generate_tokens(admin)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    url = reverse("user-list")
+
+    for size in sizes or (10_000, 100_000, 1_000_000):
+        seed_users(size)
+        first_page = client.get(url).data
+        for label, params in (
+            ("first page", {}),
+            ("next page", {"cursor": first_page["next"].split("cursor=")[1]}),
+            ("first page fields=username", {"fields": "username"}),
+        ):
+            request = lambda: client.get(url, params)  # noqa: E731
+            peak = peak_memory(request)
+            report(
+                f"{size:>9} users {label}",
+                measure(request, 50),
+                peak_kb=peak // 1024,
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""
+Encoding the user list payload: DRF's stdlib ``JSONRenderer`` against
+``FastJSONRenderer``, whole and streamed.
+
+    python -m benchmarks.bench_renderers [row counts...]
+
+Payloads are built the way ``UserViewSet.list`` builds them (default 500
+rows, the largest page, and 10k rows). ``peak`` is the largest single
+chunk held in memory at once. Without ``orjson`` installed the fast renderer
+falls back to stdlib and the first two rows match.
+"""
+
+import sys
+
+from benchmarks import measure, report, seed_users, setup_django
+
+
+def main(*sizes):
+    setup_django()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from accounts.models import User
+    from accounts.renderers import (
+        FastJSONRenderer,
+        get_json_streaming_settings,
+        orjson,
+    )
+    from accounts.serializers import RowSerializer, UserSerializer
+
+    sizes = sizes or (500, 10_000)
+    seed_users(max(sizes))
+    fields = UserSerializer.output_fields()
+    chunk_rows = get_json_streaming_settings()["CHUNK_ROWS"]
+    print(f"orjson: {'installed' if orjson else 'missing'}")
+
+    for size in sizes:
+        rows = User.objects.order_by("-date_joined", "-id").values_list(
+            "id", "date_joined", *fields, named=True
+        )[:size]
+        payload = {
+            "next": "http://testserver/api/v1/users/?cursor=cD0yMDI0",
+            "previous": None,
+            "results": RowSerializer(UserSerializer, list(rows), fields).data,
+        }
+        iterations = max(5, 20_000 // size)
+        fast = FastJSONRenderer()
+
+        for label, func in (
+            ("JSONRenderer", lambda: [JSONRenderer().render(payload)]),
+            ("FastJSONRenderer", lambda: [fast.render(payload)]),
+            (
+                "FastJSONRenderer streamed",
+                lambda: list(fast.iter_render(payload, chunk_rows)),
+            ),
+        ):
+            peak = max(len(chunk) for chunk in func())
+            report(f"{size:>6} rows {label}", measure(func, iterations), peak=peak)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""
+Regular-user scope: the OR filter against the UNION rewrite.
+
+    python -m benchmarks.bench_scope [friend counts...]
+
+For one user with each number of friends (default 1k, 10k and 100k, seeded
+cumulatively), times the first cursor page of ``UserViewSet.own_and_friends``
+with ``USER_SCOPE_UNION`` off and on, and the single-row detail lookup.
+Run it against the production database vendor before changing the default.
+"""
+
+import sys
+
+from benchmarks import count_queries, measure, report, seed_users, setup_django
+
+
+def main(*friend_counts):
+    setup_django()
+
+    from django.test import override_settings
+
+    from accounts.models import User
+    from accounts.views import UserViewSet
+
+    seed_users(50_000)
+    owner = User.objects.create(username="bench-owner", password="!")
+    ordering = ("-date_joined", "-id")
+
+    friends = 0
+    for target in friend_counts or (1_000, 10_000, 100_000):
+        User.objects.bulk_create(
+            User(
+                username=f"bench-friend{n}",
+                password="!",
+                role=User.FRIEND,
+                created_by=owner,
+            )
+            for n in range(friends, target)
+        )
+        friends = target
+        last_friend = User.objects.filter(created_by=owner).order_by("id").last()
+
+        with override_settings(USER_SCOPE_UNION=False):
+            or_scope = UserViewSet(detail=False).own_and_friends(owner)
+        with override_settings(USER_SCOPE_UNION=True):
+            union_scope = UserViewSet(detail=False).own_and_friends(owner)
+        detail_scope = UserViewSet(detail=True).own_and_friends(owner)
+
+        for label, page in (
+            ("OR page", lambda: list(or_scope.order_by(*ordering)[:51])),
+            ("UNION page", lambda: list(union_scope.order_by(*ordering)[:51])),
+            ("detail", lambda: detail_scope.get(pk=last_friend.pk)),
+        ):
+            report(
+                f"{friends:>7} friends {label}",
+                measure(page, 20),
+                queries=count_queries(page),
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
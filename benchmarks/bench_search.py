@@ -0,0 +1,32 @@
+"""
+Autocomplete latency of the user search backend against the icontains scan.
+
+    python -m benchmarks.bench_search [sizes...]
+"""
+
+import sys
+
+from benchmarks import measure, report, seed_users, setup_django
+
+
+def main(*sizes):
+    setup_django()
+
+    from accounts.models import User
+    from accounts.search import BaseSearchBackend, get_search_backend
+
+    indexed = get_search_backend()
+    scan = BaseSearchBackend()
+
+    for size in sizes or (10_000, 100_000, 1_000_000):
+        seed_users(size)
+        indexed.rebuild()
+        for term in ("seed12345", "seed999"):
+            for label, backend in (("icontains", scan), ("indexed", indexed)):
+                queryset = backend.filter(User.objects.all(), [term])
+                ids = lambda: list(queryset.values_list("id", flat=True)[:10])  # noqa: E731
+                report(f"{size:>9} {label} {term!r}", measure(ids, 50))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,57 @@
+"""
+List-row serialization: ``UserSerializer`` over model instances against the
+compiled ``RowSerializer`` over named value rows.
+
+    python -m benchmarks.bench_serializers [row counts...]
+
+For each page size (default 1k and 10k rows) times serializing rows that are
+already loaded, and loading plus serializing them, with the columns the
+user list selects.
+"""
+
+import sys
+
+from benchmarks import measure, report, seed_users, setup_django
+
+
+def main(*sizes):
+    setup_django()
+
+    from accounts.models import User
+    from accounts.serializers import RowSerializer, UserSerializer
+
+    sizes = sizes or (1_000, 10_000)
+    seed_users(max(sizes))
+    fields = UserSerializer.output_fields()
+    columns = ("id", "date_joined", *fields)
+
+    for size in sizes:
+        users = User.objects.order_by("-date_joined", "-id")
+        instances = users.only(*columns)[:size]
+        rows = users.values_list(*columns, named=True)[:size]
+        loaded_instances, loaded_rows = list(instances), list(rows)
+        iterations = max(5, 50_000 // size)
+
+        for label, func in (
+            (
+                "UserSerializer",
+                lambda: UserSerializer(loaded_instances, many=True).data,
+            ),
+            (
+                "RowSerializer",
+                lambda: RowSerializer(UserSerializer, loaded_rows, fields).data,
+            ),
+            (
+                "UserSerializer + query",
+                lambda: UserSerializer(instances.all(), many=True).data,
+            ),
+            (
+                "RowSerializer + query",
+                lambda: RowSerializer(UserSerializer, rows.all(), fields).data,
+            ),
+        ):
+            report(f"{size:>6} rows {label}", measure(func, iterations))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""
+Sign and verify throughput per JWT algorithm through the key ring.
+
+    python -m benchmarks.bench_signing [iterations]
+
+ES256 and EdDSA are skipped when ``cryptography`` is not installed.
+"""
+
+import sys
+import time
+
+from benchmarks import setup_django
+
+
+def generate_pem(alg):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    if alg == "ES256":
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        key = ed25519.Ed25519PrivateKey.generate()
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def throughput(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+def main(iterations=5_000):
+    setup_django()
+
+    from accounts.keyring import KeyRing, SigningKey
+
+    payload = {
+        "user_id": 1,
+        "username": "bench",
+        "email": "bench@example.com",
+        "role": "user",
+        "exp": int(time.time()) + 3600,
+        "iat": int(time.time()),
+        "token_type": "access",
+    }
+    for alg in ("HS256", "ES256", "EdDSA"):
+        if alg == "HS256":
+            config = {"kid": alg, "alg": alg, "secret": "s" * 32}
+        else:
+            try:
+                config = {"kid": alg, "alg": alg, "private_key": generate_pem(alg)}
+            except ImportError:
+                print(f"{alg:<6} skipped (cryptography not installed)")
+                continue
+        ring = KeyRing([SigningKey.from_config(config)], alg)
+        token = ring.sign(payload)
+        signs = throughput(lambda: ring.sign(payload), iterations)
+        verifies = throughput(lambda: ring.verify(token), iterations)
+        print(f"{alg:<6} sign {signs:>9.0f}/s  verify {verifies:>9.0f}/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,50 @@
+"""
+Read-replica routing.
+
+Reads go to the primary unless the code running them opted in with
+``replica_reads()``; ``UserViewSet`` does so for safe HTTP methods, except
+for the list and analytics data it caches under a scope version. Replicas
+are the ``replica_*`` aliases in ``DATABASES``; without any, every query
+stays on ``default``.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_use_replicas = ContextVar("use_replicas", default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Send reads issued inside the block to a replica when ``enabled``."""
+    token = _use_replicas.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _use_replicas.get():
+            return None
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        # Also covers saving an instance that was read from a replica.
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects may relate across them.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return not db.startswith("replica_")
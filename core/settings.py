@@ -1,5 +1,6 @@
 import logging
 import logging.config
+import os
 from pathlib import Path
 from corsheaders.defaults import default_headers
 
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "accounts.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -51,12 +53,28 @@ ROOT_URLCONF = "core.urls"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
+        # JWT goes first so bearer requests reuse the result AuthMiddleware
+        # already stored on the request instead of authenticating twice.
+        "accounts.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
-        "accounts.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # orjson-backed JSON when it is installed, stdlib json otherwise.
+    "DEFAULT_RENDERER_CLASSES": (
+        "accounts.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "accounts.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Trusted proxies in front of the app. Throttles key on the client address
+    # these proxies append to X-Forwarded-For; with 0 the header is ignored and
+    # REMOTE_ADDR is used, so clients cannot rotate their own bucket key.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
 SPECTACULAR_SETTINGS = {
     "TITLE": "Role Based API",
@@ -68,6 +86,102 @@ SPECTACULAR_SETTINGS = {
 
 AUTH_USER_MODEL = "accounts.User"
 
+# JWT signing keys (accounts.keyring). New tokens are signed with
+# JWT_ACTIVE_KID; every listed key still verifies, which allows rotation.
+# ES256/EdDSA entries take "private_key"/"public_key" PEM strings instead of
+# "secret" and are published at /api/v1/auth/jwks/.
+JWT_SIGNING_KEYS = [
+    {"kid": "default", "alg": "HS256", "secret": SECRET_KEY},
+]
+JWT_ACTIVE_KID = "default"
+
+# In-process cache of verified access tokens (entries per process, seconds).
+JWT_AUTH_CACHE_SIZE = 10_000
+JWT_AUTH_CACHE_TTL = 60
+
+# Opt-in: build request.user from access-token claims instead of loading the
+# User row. Claims are trusted for at most JWT_CLAIMS_MAX_AGE seconds and only
+# while the token's "ver" claim matches the user's current claims version.
+# Claims versions live in the default cache, so this stays off unless that
+# cache is shared by every process (accounts.cache).
+JWT_CLAIMS_PRINCIPAL = False
+JWT_CLAIMS_MAX_AGE = 300
+
+# Per-request profiling (accounts.profiling): Server-Timing headers and
+# histograms at /api/v1/profiling/. SAMPLE_RATE is the fraction of requests
+# measured; the middleware unloads itself entirely while disabled.
+PROFILING = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 0.01,
+    "SERVER_TIMING": True,
+}
+
+# Password hashing pool for sign-in and registration (accounts.hashing).
+# Requests beyond WORKERS + QUEUE_LIMIT in flight get an immediate 503.
+PASSWORD_HASHING_EXECUTOR = "thread"  # or "process"
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_QUEUE_LIMIT = 64
+
+# Route the auth endpoints, users/register and the user read endpoints to the
+# native async views (accounts.async_views); core/asgi.py turns this on for
+# ASGI deployments.
+ASYNC_AUTH_VIEWS = os.environ.get("DJANGO_ASYNC_AUTH_VIEWS") == "1"
+
+# Token-bucket throttling of the public auth endpoints (accounts.throttling).
+# Each scope limits requests per client IP, per submitted username and for
+# the whole route. STORE "memory" keeps buckets per process; "cache" shares
+# them through CACHES[CACHE_ALIAS] between workers.
+THROTTLING = {
+    "ENABLED": True,
+    "STORE": "memory",
+    "CACHE_ALIAS": "default",
+    "SCOPES": {
+        "login": {"ip": "30/min", "username": "10/min", "route": "1200/min"},
+        "refresh": {"ip": "60/min"},
+        "register": {"ip": "10/hour", "route": "120/min"},
+    },
+}
+
+# Bulk user import (accounts.bulk). Passwords are hashed on one process pool
+# per web worker, shared by concurrent imports; None sizes it to the CPUs.
+BULK_IMPORT_BATCH_SIZE = 1000
+BULK_IMPORT_WORKERS = None
+
+# User list pages with at least MIN_ROWS results are streamed, encoding
+# CHUNK_ROWS rows at a time (accounts.renderers).
+JSON_STREAMING = {
+    "MIN_ROWS": 200,
+    "CHUNK_ROWS": 100,
+}
+
+# Rows fetched per round trip by the streaming user export (accounts.export).
+USER_EXPORT_CHUNK_SIZE = 2000
+
+# The default cache holds the shared version counters (tokens, sessions,
+# permissions, list scopes); point it at a shared backend such as Redis when
+# running more than one process. With a per-process backend (locmem, dummy)
+# the session, permissions and list-scope versions expire after
+# LOCAL_VERSION_TIMEOUT seconds instead (accounts.cache).
+LOCAL_VERSION_TIMEOUT = 30
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Cached user list, my_friends and analytics responses
+# (accounts.response_cache). ALIAS names the CACHES entry; set it to None to
+# turn the cache off. LOCK_TIMEOUT bounds how long requests wait for another
+# one rebuilding the same entry (seconds).
+USER_RESPONSE_CACHE = {
+    "ALIAS": "responses",
+    "TIMEOUT": 300,
+    "LOCK_TIMEOUT": 5,
+}
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -87,12 +201,77 @@ TEMPLATES = [
 WSGI_APPLICATION = "core.wsgi.application"
 
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Database profile, chosen with DB_PROFILE:
+#   sqlite        WAL journal, busy timeout and IMMEDIATE write transactions
+#                 so concurrent writers queue instead of failing with
+#                 "database is locked" (default)
+#   sqlite-basic  the plain SQLite defaults, for comparison
+#   postgres      POSTGRES_* variables; POSTGRES_POOL=1 uses psycopg's pool,
+#                 otherwise connections persist for CONN_MAX_AGE seconds.
+#                 POSTGRES_REPLICA_HOSTS (comma-separated) adds read replicas
+#                 that serve UserViewSet reads (core.routers).
+DB_PROFILE = os.environ.get("DB_PROFILE", "sqlite")
+
+if DB_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "accounts"),
+            "USER": os.environ.get("POSTGRES_USER", "postgres"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            "CONN_HEALTH_CHECKS": True,
+        }
     }
-}
+    if os.environ.get("POSTGRES_POOL") == "1":
+        # Django's pool cannot be combined with persistent connections.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.environ.get("POSTGRES_POOL_MIN", 2)),
+                "max_size": int(os.environ.get("POSTGRES_POOL_MAX", 20)),
+            }
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = int(
+            os.environ.get("POSTGRES_CONN_MAX_AGE", 60)
+        )
+    for index, host in enumerate(
+        filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))
+    ):
+        DATABASES[f"replica_{index}"] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+elif DB_PROFILE == "sqlite-basic":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    "PRAGMA busy_timeout=5000;"
+                    "PRAGMA mmap_size=134217728;"
+                ),
+                # Take the write lock when the transaction starts; upgrading
+                # a read lock later fails immediately instead of waiting.
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ["core.routers.ReadReplicaRouter"]
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -0,0 +1,9 @@
+"""URLconf that serves the async accounts views, as ASGI deployments do."""
+
+from django.urls import include, path
+
+from accounts.urls import async_urlpatterns, router
+
+urlpatterns = [
+    path("api/v1/", include(async_urlpatterns + [path("", include(router.urls))])),
+]
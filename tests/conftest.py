@@ -1,41 +1,9 @@
 import pytest
-from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from pytest_factoryboy import register
-from faker import Faker
-import factory
 from django.urls import reverse
 
-
-fake = Faker()
-
-User = get_user_model()
-
-
-class UserFactory(factory.django.DjangoModelFactory):
-    class Meta:
-        model = User
-
-    username = factory.Sequence(lambda n: f"user{n}")
-    email = factory.LazyAttribute(lambda obj: f"{obj.username}@example.com")
-    password = factory.PostGenerationMethodCall("set_password", "password123")
-    first_name = factory.LazyFunction(lambda: fake.first_name())
-    last_name = factory.LazyFunction(lambda: fake.last_name())
-    is_active = True
-
-
-class AdminFactory(UserFactory):
-    role = "admin"
-    is_staff = True
-    is_superuser = False
-
-
-class RegularUserFactory(UserFactory):
-    role = "user"
-
-
-class FriendUserFactory(UserFactory):
-    role = "friend"
+from tests.factories import AdminFactory, FriendUserFactory, RegularUserFactory
 
 
 # Register factories
@@ -45,6 +13,36 @@ register(FriendUserFactory)
 
 
 # Fixtures
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Keep verified tokens and claims versions from leaking between tests"""
+    from django.core.cache import caches
+    from accounts.authentication import token_cache
+    from accounts.throttling import reset_throttle_store
+
+    token_cache.clear()
+    reset_throttle_store()
+    for cache in caches.all():
+        cache.clear()
+    yield
+    token_cache.clear()
+    reset_throttle_store()
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """Back the default cache with one every process could share"""
+    settings.CACHES = {
+        **settings.CACHES,
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        },
+    }
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -0,0 +1,38 @@
+"""
+factory-boy factories shared by the test suite and the benchmarks.
+"""
+
+import factory
+from django.contrib.auth import get_user_model
+from faker import Faker
+
+
+fake = Faker()
+
+User = get_user_model()
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: f"user{n}")
+    email = factory.LazyAttribute(lambda obj: f"{obj.username}@example.com")
+    password = factory.PostGenerationMethodCall("set_password", "password123")
+    first_name = factory.LazyFunction(lambda: fake.first_name())
+    last_name = factory.LazyFunction(lambda: fake.last_name())
+    is_active = True
+
+
+class AdminFactory(UserFactory):
+    role = "admin"
+    is_staff = True
+    is_superuser = False
+
+
+class RegularUserFactory(UserFactory):
+    role = "user"
+
+
+class FriendUserFactory(UserFactory):
+    role = "friend"
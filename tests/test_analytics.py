@@ -0,0 +1,80 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from accounts.models import FriendCount, UserCount
+
+pytestmark = pytest.mark.django_db
+
+
+class TestAnalyticsCounters:
+    def test_counts_track_creates_updates_and_deletes(
+        self, authenticated_admin_client, regular_user, friend_user_factory
+    ):
+        friends = friend_user_factory.create_batch(2, created_by=regular_user)
+        url = reverse("user-analytics")
+
+        response = authenticated_admin_client.get(url)
+        assert response.data["total_users"] == 4
+        assert response.data["total_friends"] == 2
+        assert response.data["friends_by_creator"] == [
+            {
+                "creator_id": regular_user.id,
+                "username": regular_user.username,
+                "count": 2,
+            }
+        ]
+
+        friends[0].is_active = False
+        friends[0].save()
+        friends[1].delete()
+
+        response = authenticated_admin_client.get(url)
+        assert response.data["total_friends"] == 1
+        assert response.data["by_role"]["friend"] == {"active": 0, "inactive": 1}
+        assert sum(row["count"] for row in response.data["signups"]) == 3
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_reads_no_user_rows(self, authenticated_admin_client):
+        url = reverse("user-analytics")
+        authenticated_admin_client.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            authenticated_admin_client.get(url)
+
+        assert not any(
+            'FROM "accounts_user"' in query["sql"] for query in ctx.captured_queries
+        )
+
+    @pytest.mark.parametrize(
+        "query, detail",
+        [
+            ("days=abc", "days must be an integer"),
+            ("days=0", "days must be between 1 and 3650"),
+            ("days=99999999999", "days must be between 1 and 3650"),
+            ("top=-1", "top must be between 1 and 1000"),
+        ],
+    )
+    def test_rejects_out_of_range_parameters(
+        self, authenticated_admin_client, query, detail
+    ):
+        url = f"{reverse('user-analytics')}?{query}"
+
+        response = authenticated_admin_client.get(url)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"detail": detail}
+
+    def test_reconcile_repairs_drift(self, regular_user):
+        UserCount.objects.all().delete()
+        FriendCount.objects.create(creator=regular_user, count=7)
+
+        call_command("reconcile_user_counters", stdout=StringIO())
+
+        assert UserCount.objects.get(role="user", is_active=True).count == 1
+        assert not FriendCount.objects.exists()
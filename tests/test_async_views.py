@@ -0,0 +1,198 @@
+import json
+from inspect import iscoroutinefunction
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import resolve, reverse
+
+from accounts import async_views
+from accounts.middleware import AuthMiddleware
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls("tests.async_urls")]
+
+
+def call(method, url, token=None, data=None, headers=None):
+    client = AsyncClient()
+    headers = dict(headers or {})
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    kwargs = {"headers": headers}
+    if data is not None:
+        kwargs.update(data=json.dumps(data), content_type="application/json")
+    return async_to_sync(getattr(client, method))(url, **kwargs)
+
+
+def login(user):
+    response = call(
+        "post",
+        reverse("auth-token"),
+        data={"username": user.username, "password": "password123"},
+    )
+    return response.json()
+
+
+def test_routes_resolve_to_async_views():
+    assert resolve(reverse("user-list")).func is async_views.user_list
+    assert resolve(reverse("user-detail", args=[1])).func is async_views.user_detail
+
+
+def test_middleware_view_hook_is_async_under_asgi():
+    async def get_response(request):
+        return None
+
+    middleware = AuthMiddleware(get_response)
+
+    assert iscoroutinefunction(middleware.process_view)
+
+
+class TestUserReads:
+    def test_list_requires_authentication(self):
+        response = call("get", reverse("user-list"))
+
+        assert response.status_code == 401
+
+    def test_regular_user_list_is_scoped(
+        self, regular_user, friend_user_factory, regular_user_factory
+    ):
+        friend = friend_user_factory(created_by=regular_user)
+        regular_user_factory()
+        token = login(regular_user)["access_token"]
+
+        response = call("get", reverse("user-list"), token)
+
+        assert response.status_code == 200
+        usernames = {user["username"] for user in response.json()["results"]}
+        assert usernames == {regular_user.username, friend.username}
+
+    def test_unchanged_list_is_not_modified(self, regular_user):
+        token = login(regular_user)["access_token"]
+        etag = call("get", reverse("user-list"), token)["ETag"]
+
+        response = call(
+            "get", reverse("user-list"), token, headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+    def test_retrieve_outside_scope_is_not_found(self, regular_user, admin_user):
+        token = login(regular_user)["access_token"]
+
+        own = call("get", reverse("user-detail", args=[regular_user.pk]), token)
+        other = call("get", reverse("user-detail", args=[admin_user.pk]), token)
+
+        assert own.status_code == 200
+        assert own.json()["username"] == regular_user.username
+        assert other.status_code == 404
+
+    def test_writes_reach_the_sync_viewset(self, admin_user, regular_user):
+        token = login(admin_user)["access_token"]
+
+        response = call(
+            "patch",
+            reverse("user-detail", args=[regular_user.pk]),
+            token,
+            {"first_name": "Async"},
+        )
+
+        assert response.status_code == 200
+        regular_user.refresh_from_db()
+        assert regular_user.first_name == "Async"
+
+    def test_my_friends_and_analytics_permissions(
+        self, regular_user, admin_user, friend_user_factory
+    ):
+        friend_user_factory(created_by=regular_user)
+        user_token = login(regular_user)["access_token"]
+        admin_token = login(admin_user)["access_token"]
+
+        friends = call("get", reverse("user-my-friends"), user_token)
+        denied = call("get", reverse("user-analytics"), user_token)
+        analytics = call("get", reverse("user-analytics"), admin_token)
+
+        assert friends.status_code == 200
+        assert len(friends.json()["results"]) == 1
+        assert denied.status_code == 403
+        assert analytics.status_code == 200
+        assert analytics.json()["total_friends"] == 1
+
+    def test_cached_reads_use_primary(self, settings, admin_user):
+        token = login(admin_user)["access_token"]
+        # Routing any of these reads to the unconfigured replica would fail.
+        settings.DATABASES = {**settings.DATABASES, "replica_0": {}}
+
+        for name in ("user-list", "user-my-friends", "user-analytics"):
+            assert call("get", reverse(name), token).status_code == 200
+
+    def test_analytics_rejects_out_of_range_days(self, admin_user):
+        admin_token = login(admin_user)["access_token"]
+
+        url = f"{reverse('user-analytics')}?days=99999999999"
+
+        response = call("get", url, admin_token)
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": "days must be between 1 and 3650"}
+
+
+class TestAuthEndpoints:
+    def test_refresh_is_single_use(self, regular_user):
+        refresh_token = login(regular_user)["refresh_token"]
+        url = reverse("auth-refresh-token")
+
+        first = call("post", url, data={"refresh_token": refresh_token})
+        second = call("post", url, data={"refresh_token": refresh_token})
+
+        assert first.status_code == 200
+        assert second.status_code == 401
+
+    def test_logout_revokes_refresh_token(self, regular_user):
+        refresh_token = login(regular_user)["refresh_token"]
+
+        response = call(
+            "post", reverse("auth-logout"), data={"refresh_token": refresh_token}
+        )
+
+        assert response.status_code == 204
+        response = call(
+            "post", reverse("auth-refresh-token"), data={"refresh_token": refresh_token}
+        )
+        assert response.status_code == 401
+
+    def test_login_is_throttled(self, settings, regular_user):
+        settings.THROTTLING = {
+            **settings.THROTTLING,
+            "SCOPES": {"login": {"username": "1/min"}},
+        }
+        login(regular_user)
+
+        response = call(
+            "post",
+            reverse("auth-token"),
+            data={"username": regular_user.username, "password": "password123"},
+        )
+
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+
+    def test_jwks_is_public(self):
+        response = call("get", reverse("auth-jwks"))
+
+        assert response.status_code == 200
+        assert "keys" in response.json()
+
+
+class TestExport:
+    def test_streams_without_buffering(self, admin_user, regular_user_factory):
+        regular_user_factory.create_batch(3)
+        token = login(admin_user)["access_token"]
+
+        response = call("get", reverse("user-export"), token)
+
+        async def body():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        assert response.is_async
+        rows = [json.loads(line) for line in async_to_sync(body)().splitlines()]
+        assert len(rows) == 4
@@ -1,6 +1,14 @@
+import time
+from unittest import mock
+
+import jwt
 import pytest
+from django.db.models import F
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
 
 pytestmark = pytest.mark.django_db
 
@@ -60,6 +68,92 @@ class TestTokenRefresh:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+def login(client, user):
+    response = client.post(
+        reverse("auth-token"), {"username": user.username, "password": "password123"}
+    )
+    return response.data["access_token"], response.data["refresh_token"]
+
+
+class TestRefreshRotation:
+    def test_refresh_token_is_single_use(self, api_client, regular_user):
+        _, refresh_token = login(api_client, regular_user)
+        url = reverse("auth-refresh-token")
+
+        first = api_client.post(url, {"refresh_token": refresh_token})
+        second = api_client.post(url, {"refresh_token": refresh_token})
+
+        assert first.status_code == status.HTTP_200_OK
+        assert second.status_code == status.HTTP_401_UNAUTHORIZED
+        assert second.data["error"] == "Refresh token has already been used"
+
+    def test_reuse_revokes_every_session(self, api_client, regular_user):
+        access_token, refresh_token = login(api_client, regular_user)
+        url = reverse("auth-refresh-token")
+        rotated = api_client.post(url, {"refresh_token": refresh_token}).data
+
+        api_client.post(url, {"refresh_token": refresh_token})
+
+        response = api_client.post(url, {"refresh_token": rotated["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        for token in (access_token, rotated["access_token"]):
+            api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+            response = api_client.get(reverse("user-list"))
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_logout_revokes_family_only(self, api_client, regular_user):
+        _, refresh_token = login(api_client, regular_user)
+        _, other_refresh_token = login(api_client, regular_user)
+        url = reverse("auth-refresh-token")
+
+        response = api_client.post(
+            reverse("auth-logout"), {"refresh_token": refresh_token}
+        )
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = api_client.post(url, {"refresh_token": refresh_token})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        response = api_client.post(url, {"refresh_token": other_refresh_token})
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_admin_revokes_cached_access_token(
+        self, authenticated_admin_client, regular_user
+    ):
+        api_client = APIClient()
+        access_token, _ = login(api_client, regular_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        assert api_client.get(reverse("user-list")).status_code == status.HTTP_200_OK
+
+        response = authenticated_admin_client.post(
+            reverse("user-revoke-sessions", args=[regular_user.pk])
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = api_client.get(reverse("user-list"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Token has been revoked"
+
+    def test_revocation_by_another_process_without_shared_cache(
+        self, settings, monkeypatch, api_client, regular_user
+    ):
+        access_token, _ = login(api_client, regular_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        assert api_client.get(reverse("user-list")).status_code == status.HTTP_200_OK
+
+        # Another worker revoked the sessions; this process's cache never saw it.
+        User.objects.filter(pk=regular_user.pk).update(
+            session_version=F("session_version") + 1
+        )
+        assert api_client.get(reverse("user-list")).status_code == status.HTTP_200_OK
+
+        # The local copy expires and the revocation is read from the column.
+        later = time.time() + settings.LOCAL_VERSION_TIMEOUT + 1
+        monkeypatch.setattr("time.time", lambda: later)
+
+        response = api_client.get(reverse("user-list"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 class TestUserManagement:
     def test_reqister_user(self, api_client):
         url = reverse("user-register")
@@ -91,14 +185,14 @@ class TestUserManagement:
         url = reverse("user-list")
         response = authenticated_admin_client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert isinstance(response.data, list)
+        assert isinstance(response.data["results"], list)
 
     def test_list_user_as_regular_user(self, authenticated_user_client, regular_user):
         url = reverse("user-list")
         response = authenticated_user_client.get(url)
         assert response.status_code == status.HTTP_200_OK
 
-        for user in response.data:
+        for user in response.data["results"]:
             assert user.get("username") == regular_user.username
 
     def test_analytics_as_admin(self, authenticated_admin_client):
@@ -115,3 +209,107 @@ class TestUserManagement:
         response = authenticated_user_client.get(url)
 
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.fixture
+def jwt_decode_spy():
+    with mock.patch("accounts.authentication.jwt.decode", wraps=jwt.decode) as spy:
+        yield spy
+
+
+class TestJWTAuthentication:
+    def test_request_decodes_token_once(self, authenticated_user_client, jwt_decode_spy):
+        url = reverse("user-list")
+        response = authenticated_user_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert jwt_decode_spy.call_count == 1
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_cached_token_skips_decode_and_user_lookup(
+        self,
+        settings,
+        authenticated_user_client,
+        jwt_decode_spy,
+        django_assert_num_queries,
+    ):
+        settings.USER_RESPONSE_CACHE = {"ALIAS": None}
+        url = reverse("user-list")
+        authenticated_user_client.get(url)
+
+        # Only the list query remains once the token is cached.
+        with django_assert_num_queries(1):
+            response = authenticated_user_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert jwt_decode_spy.call_count == 1
+
+    def test_user_save_invalidates_cached_token(
+        self, authenticated_user_client, regular_user, jwt_decode_spy
+    ):
+        url = reverse("user-list")
+        authenticated_user_client.get(url)
+
+        regular_user.first_name = "Changed"
+        regular_user.save()
+        authenticated_user_client.get(url)
+
+        assert jwt_decode_spy.call_count == 2
+
+
+    def test_claims_are_not_trusted_without_shared_cache(
+        self, settings, authenticated_user_client, django_assert_num_queries
+    ):
+        settings.JWT_CLAIMS_PRINCIPAL = True
+
+        # The user row is loaded every time.
+        with django_assert_num_queries(2):
+            authenticated_user_client.get(reverse("user-list"))
+
+
+@pytest.mark.usefixtures("shared_cache")
+class TestClaimsPrincipal:
+    @pytest.fixture(autouse=True)
+    def claims_mode(self, settings):
+        settings.JWT_CLAIMS_PRINCIPAL = True
+
+    def test_list_without_user_lookup(
+        self, authenticated_user_client, regular_user, django_assert_num_queries
+    ):
+        url = reverse("user-list")
+
+        with django_assert_num_queries(1):
+            response = authenticated_user_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["username"] == regular_user.username
+
+    def test_role_change_stops_trusting_claims(
+        self, authenticated_user_client, regular_user
+    ):
+        regular_user.role = "admin"
+        regular_user.save()
+
+        response = authenticated_user_client.get(reverse("user-analytics"))
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_expired_claims_fall_back_to_user_row(
+        self, settings, authenticated_user_client, django_assert_num_queries
+    ):
+        settings.JWT_CLAIMS_MAX_AGE = 0
+
+        with django_assert_num_queries(2):
+            authenticated_user_client.get(reverse("user-list"))
+
+    def test_unknown_field_loads_user_once(self, regular_user, django_assert_num_queries):
+        from accounts.authentication import ClaimsUser
+
+        principal = ClaimsUser(
+            regular_user.id, regular_user.username, regular_user.email, "user"
+        )
+
+        with django_assert_num_queries(1):
+            assert principal.first_name == regular_user.first_name
+            assert principal.last_name == regular_user.last_name
+        assert principal == regular_user
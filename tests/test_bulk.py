@@ -0,0 +1,133 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from accounts import bulk
+from accounts.models import User, UserCount
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fast_hasher(settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def jsonl(*rows):
+    return "\n".join(json.dumps(row) for row in rows)
+
+
+def user_row(username, **extra):
+    return {"username": username, "password": "password123", **extra}
+
+
+class TestBulkImportEndpoint:
+    url = reverse("user-bulk-import")
+
+    def test_jsonl_import_reports_per_row_errors(
+        self, authenticated_admin_client, admin_user, regular_user
+    ):
+        body = jsonl(
+            user_row("alice", email="alice@example.com"),
+            user_row("bob", role="friend"),
+            user_row("alice"),
+            user_row(regular_user.username),
+            {"username": "nopassword"},
+        ) + "\nnot json"
+
+        response = authenticated_admin_client.post(
+            self.url, body, content_type="application/jsonl"
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["created"] == 2
+        assert [error["line"] for error in response.data["errors"]] == [3, 4, 5, 6]
+
+        bob = User.objects.get(username="bob")
+        assert bob.created_by_id == admin_user.id
+        assert bob.check_password("password123")
+        assert list(bob.groups.values_list("name", flat=True)) == ["Friend"]
+        assert UserCount.objects.get(role="friend", is_active=True).count == 1
+
+    def test_csv_import(self, authenticated_admin_client):
+        body = "username,password,email\ncarol,password123,carol@example.com\n"
+
+        response = authenticated_admin_client.post(
+            self.url, body, content_type="text/csv"
+        )
+
+        assert response.data == {"created": 1, "errors": []}
+        assert User.objects.filter(username="carol", role="user").exists()
+
+    def test_queries_do_not_grow_per_row(self, authenticated_admin_client):
+        def import_queries(prefix, count):
+            body = jsonl(*(user_row(f"{prefix}{n}") for n in range(count)))
+            with CaptureQueriesContext(connection) as ctx:
+                authenticated_admin_client.post(
+                    self.url, body, content_type="application/jsonl"
+                )
+            return len(ctx.captured_queries)
+
+        import_queries("warmup", 1)
+        assert import_queries("small", 2) == import_queries("large", 20)
+
+    @pytest.mark.parametrize("batch_size", ["-5", "0", "abc"])
+    def test_rejects_invalid_batch_size(self, authenticated_admin_client, batch_size):
+        response = authenticated_admin_client.post(
+            f"{self.url}?batch_size={batch_size}",
+            jsonl(user_row("dave")),
+            content_type="application/jsonl",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not User.objects.filter(username="dave").exists()
+
+    def test_imports_share_one_process_pool(self, settings, authenticated_admin_client):
+        settings.BULK_IMPORT_WORKERS = 2
+
+        def post(username):
+            authenticated_admin_client.post(
+                self.url, jsonl(user_row(username)), content_type="application/jsonl"
+            )
+
+        post("frank")
+        executor = bulk._executor
+        post("grace")
+
+        assert executor is not None
+        assert bulk._executor is executor
+        # Left running for the next import.
+        assert executor.submit(int, "1").result() == 1
+        assert User.objects.get(username="grace").check_password("password123")
+
+    def test_requires_admin(self, authenticated_user_client):
+        response = authenticated_user_client.post(
+            self.url, jsonl(user_row("eve")), content_type="application/jsonl"
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestImportUsersCommand:
+    def test_imports_file_with_process_pool(self, tmp_path, regular_user):
+        path = tmp_path / "users.jsonl"
+        path.write_text(
+            jsonl(*(user_row(f"pooled{n}", role="friend") for n in range(4)))
+        )
+
+        call_command(
+            "import_users",
+            str(path),
+            workers=2,
+            batch_size=3,
+            created_by=regular_user.username,
+            stdout=StringIO(),
+        )
+
+        assert regular_user.created_friends.count() == 4
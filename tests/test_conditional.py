@@ -0,0 +1,133 @@
+import time
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.bulk import import_users
+from accounts.conditional import ALL_USERS, get_scope_version
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("shared_cache")]
+
+
+class TestListETags:
+    def test_list_response_headers(self, authenticated_user_client):
+        response = authenticated_user_client.get(reverse("user-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"].startswith('"')
+        assert set(response["Cache-Control"].split(", ")) == {"private", "no-cache"}
+        assert "Authorization" in response["Vary"]
+
+    @pytest.mark.parametrize("url_name", ["user-list", "user-my-friends"])
+    def test_unchanged_list_is_not_modified_without_queries(
+        self, authenticated_user_client, django_assert_num_queries, url_name
+    ):
+        url = reverse(url_name)
+        etag = authenticated_user_client.get(url)["ETag"]
+
+        with django_assert_num_queries(0):
+            response = authenticated_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert not response.content
+
+    def test_etag_depends_on_query_string(self, authenticated_admin_client):
+        url = reverse("user-list")
+        etag = authenticated_admin_client.get(url)["ETag"]
+
+        response = authenticated_admin_client.get(
+            url, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestScopeVersions:
+    def test_friend_change_invalidates_creator_lists(
+        self, authenticated_user_client, regular_user, friend_user_factory
+    ):
+        friend = friend_user_factory(created_by=regular_user)
+        url = reverse("user-my-friends")
+        etag = authenticated_user_client.get(url)["ETag"]
+
+        friend.first_name = "Renamed"
+        friend.save()
+
+        response = authenticated_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["first_name"] == "Renamed"
+
+    def test_other_users_only_invalidate_admin_lists(
+        self, authenticated_user_client, admin_user, regular_user_factory
+    ):
+        stranger = regular_user_factory()
+        url = reverse("user-list")
+        user_etag = authenticated_user_client.get(url)["ETag"]
+        admin_client = APIClient()
+        token = admin_client.post(
+            reverse("auth-token"),
+            {"username": admin_user.username, "password": "password123"},
+        ).data["access_token"]
+        admin_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        admin_etag = admin_client.get(url)["ETag"]
+
+        stranger.last_name = "Changed"
+        stranger.save()
+
+        user_response = authenticated_user_client.get(url, HTTP_IF_NONE_MATCH=user_etag)
+        admin_response = admin_client.get(url, HTTP_IF_NONE_MATCH=admin_etag)
+        assert user_response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert admin_response.status_code == status.HTTP_200_OK
+
+    def test_unlisted_field_saves_keep_versions(
+        self, authenticated_user_client, regular_user
+    ):
+        url = reverse("user-list")
+        etag = authenticated_user_client.get(url)["ETag"]
+
+        regular_user.save(update_fields=["last_login"])
+
+        response = authenticated_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_activation_invalidates_analytics(
+        self, authenticated_admin_client, regular_user
+    ):
+        url = reverse("user-analytics")
+        etag = authenticated_admin_client.get(url)["ETag"]
+
+        regular_user.is_active = False
+        regular_user.save(update_fields=["is_active"])
+
+        response = authenticated_admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_bulk_import_invalidates_importer_friends(
+        self, authenticated_user_client, regular_user
+    ):
+        url = reverse("user-my-friends")
+        etag = authenticated_user_client.get(url)["ETag"]
+
+        import_users(
+            [(1, {"username": "imported", "password": "password123", "role": "friend"})],
+            created_by_id=regular_user.pk,
+            workers=1,
+        )
+
+        response = authenticated_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 1
+
+    def test_per_process_versions_expire(self, settings, monkeypatch):
+        settings.CACHES = {
+            **settings.CACHES,
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+        version = get_scope_version(ALL_USERS)
+        later = time.time() + 31
+        monkeypatch.setattr("time.time", lambda: later)
+
+        assert get_scope_version(ALL_USERS) != version
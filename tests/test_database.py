@@ -0,0 +1,63 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from core.routers import ReadReplicaRouter, replica_reads
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite profile only")
+def test_sqlite_connection_pragmas():
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        assert cursor.fetchone()[0] == 5000
+        cursor.execute("PRAGMA synchronous")
+        assert cursor.fetchone()[0] == 1  # NORMAL
+
+
+class TestReadReplicaRouter:
+    @pytest.fixture
+    def replicas(self, settings):
+        settings.DATABASES = {**settings.DATABASES, "replica_0": {}}
+
+    def test_reads_stay_on_primary_by_default(self, replicas):
+        assert ReadReplicaRouter().db_for_read(None) is None
+
+    def test_reads_go_to_replica_when_enabled(self, replicas):
+        with replica_reads():
+            assert ReadReplicaRouter().db_for_read(None) == "replica_0"
+        assert ReadReplicaRouter().db_for_read(None) is None
+
+    def test_without_replicas_reads_use_primary(self):
+        with replica_reads():
+            assert ReadReplicaRouter().db_for_read(None) is None
+
+    def test_writes_always_use_primary(self, replicas):
+        with replica_reads():
+            assert ReadReplicaRouter().db_for_write(None) == "default"
+
+    def test_user_viewset_enables_replicas_for_safe_methods(
+        self, authenticated_admin_client, regular_user
+    ):
+        with mock.patch("accounts.views.replica_reads", wraps=replica_reads) as spy:
+            authenticated_admin_client.get(reverse("user-list"))
+            authenticated_admin_client.post(
+                reverse("user-activate-user", args=[regular_user.pk])
+            )
+
+        # The list turns replicas off again for the data it caches.
+        assert [call.args for call in spy.call_args_list] == [
+            (True,),
+            (False,),
+            (False,),
+        ]
+
+    def test_cached_reads_use_primary(self, replicas, authenticated_admin_client):
+        # Routing any of these reads to the unconfigured replica would fail.
+        for name in ("user-list", "user-analytics"):
+            response = authenticated_admin_client.get(reverse(name))
+
+            assert response.status_code == 200
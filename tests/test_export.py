@@ -0,0 +1,99 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone as tz
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+pytestmark = pytest.mark.django_db
+
+
+def read(response):
+    body = b"".join(response.streaming_content)
+    if response.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return body.decode()
+
+
+def jsonl_rows(response):
+    return [json.loads(line) for line in read(response).splitlines()]
+
+
+class TestUserExport:
+    def test_requires_admin(self, authenticated_user_client):
+        response = authenticated_user_client.get(reverse("user-export"))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_streams_json_lines_in_id_order(
+        self, authenticated_admin_client, admin_user, regular_user_factory
+    ):
+        users = regular_user_factory.create_batch(3)
+
+        response = authenticated_admin_client.get(reverse("user-export"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/jsonl"
+        rows = jsonl_rows(response)
+        assert [row["id"] for row in rows] == [admin_user.pk] + [u.pk for u in users]
+        assert "password" not in rows[0]
+
+    def test_csv_with_role_filter(
+        self, authenticated_admin_client, regular_user_factory, friend_user_factory
+    ):
+        regular_user_factory()
+        friend = friend_user_factory()
+
+        response = authenticated_admin_client.get(
+            reverse("user-export"), {"as": "csv", "role": "friend"}
+        )
+
+        rows = list(csv.DictReader(io.StringIO(read(response))))
+        assert [row["username"] for row in rows] == [friend.username]
+        assert rows[0]["created_by_id"] == ""
+
+    def test_resumes_after_id(self, authenticated_admin_client, regular_user_factory):
+        users = regular_user_factory.create_batch(3)
+
+        response = authenticated_admin_client.get(
+            reverse("user-export"), {"after": users[0].pk}
+        )
+
+        assert [row["id"] for row in jsonl_rows(response)] == [
+            users[1].pk,
+            users[2].pk,
+        ]
+
+    def test_date_filters(self, authenticated_admin_client, regular_user_factory):
+        old = regular_user_factory(date_joined=datetime(2020, 1, 1, tzinfo=tz.utc))
+        regular_user_factory(date_joined=datetime(2021, 1, 1, tzinfo=tz.utc))
+
+        response = authenticated_admin_client.get(
+            reverse("user-export"),
+            {"joined_after": "2019-12-31", "joined_before": "2020-06-01"},
+        )
+
+        assert [row["id"] for row in jsonl_rows(response)] == [old.pk]
+
+    def test_gzip_when_accepted(self, authenticated_admin_client, regular_user_factory):
+        regular_user_factory.create_batch(2)
+
+        response = authenticated_admin_client.get(
+            reverse("user-export"), HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+
+        assert response["Content-Encoding"] == "gzip"
+        assert len(jsonl_rows(response)) == 3
+
+    @pytest.mark.parametrize(
+        "params",
+        [{"as": "xml"}, {"role": "owner"}, {"after": "x"}, {"joined_after": "soon"}],
+    )
+    def test_invalid_parameters(self, authenticated_admin_client, params):
+        response = authenticated_admin_client.get(reverse("user-export"), params)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,111 @@
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import status
+
+from accounts import async_views, hashing
+from accounts.hashing import HashingPool, HashingPoolSaturated
+from accounts.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def saturated_pool(monkeypatch):
+    pool = HashingPool(workers=1, queue_limit=0)
+    release = threading.Event()
+    pool.submit(release.wait)
+    monkeypatch.setattr(hashing, "_pool", pool)
+    yield pool
+    release.set()
+    pool.shutdown()
+
+
+def post_json(view, data):
+    request = AsyncRequestFactory().post(
+        "/", json.dumps(data), content_type="application/json"
+    )
+    return async_to_sync(view)(request)
+
+
+class TestHashingPool:
+    def test_rejects_beyond_queue_limit(self, saturated_pool):
+        with pytest.raises(HashingPoolSaturated):
+            saturated_pool.submit(lambda: None)
+
+    def test_frees_slot_when_done(self):
+        pool = HashingPool(workers=1, queue_limit=0)
+        assert pool.run(sum, [1, 2]) == 3
+        assert pool.run(sum, [3, 4]) == 7
+        pool.shutdown()
+
+
+class TestSyncEndpoints:
+    def test_token_returns_503_when_saturated(
+        self, api_client, regular_user, saturated_pool
+    ):
+        url = reverse("auth-token")
+
+        response = api_client.post(
+            url, {"username": regular_user.username, "password": "password123"}
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_inactive_user_cannot_sign_in(self, api_client, regular_user):
+        regular_user.is_active = False
+        regular_user.save()
+
+        response = api_client.post(
+            reverse("auth-token"),
+            {"username": regular_user.username, "password": "password123"},
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestAsyncViews:
+    def test_token(self, regular_user):
+        response = post_json(
+            async_views.token,
+            {"username": regular_user.username, "password": "password123"},
+        )
+
+        assert response.status_code == 200
+        assert json.loads(response.content)["user"]["role"] == "user"
+
+    def test_token_invalid_credentials(self, regular_user):
+        response = post_json(
+            async_views.token, {"username": regular_user.username, "password": "nope"}
+        )
+
+        assert response.status_code == 401
+
+    def test_token_returns_503_when_saturated(self, regular_user, saturated_pool):
+        response = post_json(
+            async_views.token,
+            {"username": regular_user.username, "password": "password123"},
+        )
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "1"
+
+    def test_register(self):
+        response = post_json(
+            async_views.register,
+            {
+                "username": "asyncuser",
+                "password": "password123",
+                "email": "asyncuser@example.com",
+                "role": "admin",
+            },
+        )
+
+        assert response.status_code == 201
+        user = User.objects.get(username="asyncuser")
+        assert user.role == "user"
+        assert user.check_password("password123")
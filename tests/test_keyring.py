@@ -0,0 +1,139 @@
+import time
+
+import jwt
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from rest_framework import status
+
+from accounts.keyring import KeyRing, SigningKey, get_key_ring
+
+pytestmark = pytest.mark.django_db
+
+
+def hs_key(kid, secret="s" * 32):
+    return {"kid": kid, "alg": "HS256", "secret": secret}
+
+
+def pem_keypair(alg):
+    serialization = pytest.importorskip(
+        "cryptography.hazmat.primitives.serialization"
+    )
+    if alg == "ES256":
+        from cryptography.hazmat.primitives.asymmetric import ec
+
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+
+        key = ed25519.Ed25519PrivateKey.generate()
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    return private_pem, public_pem
+
+
+def payload():
+    return {"user_id": 1, "exp": int(time.time()) + 60}
+
+
+class TestKeyRing:
+    def test_tokens_name_their_key(self, settings):
+        settings.JWT_SIGNING_KEYS = [hs_key("k1")]
+        settings.JWT_ACTIVE_KID = "k1"
+
+        token = get_key_ring().sign(payload())
+
+        assert jwt.get_unverified_header(token)["kid"] == "k1"
+        assert get_key_ring().verify(token)["user_id"] == 1
+
+    def test_rotation_keeps_old_tokens_valid(self, settings):
+        settings.JWT_SIGNING_KEYS = [hs_key("old", "o" * 32)]
+        settings.JWT_ACTIVE_KID = "old"
+        old_token = get_key_ring().sign(payload())
+
+        settings.JWT_SIGNING_KEYS = [hs_key("old", "o" * 32), hs_key("new", "n" * 32)]
+        settings.JWT_ACTIVE_KID = "new"
+
+        assert get_key_ring().verify(old_token)["user_id"] == 1
+        assert jwt.get_unverified_header(get_key_ring().sign(payload()))["kid"] == "new"
+
+    def test_unknown_kid_is_rejected(self):
+        ring = KeyRing([SigningKey.from_config(hs_key("a"))], "a")
+        foreign = jwt.encode(payload(), "x" * 32, headers={"kid": "b"})
+
+        with pytest.raises(jwt.InvalidTokenError):
+            ring.verify(foreign)
+
+    def test_unkeyed_tokens_use_active_key(self):
+        ring = KeyRing([SigningKey.from_config(hs_key("a"))], "a")
+        legacy = jwt.encode(payload(), "s" * 32, algorithm="HS256")
+
+        assert ring.verify(legacy)["user_id"] == 1
+
+    def test_active_key_must_exist(self):
+        with pytest.raises(ImproperlyConfigured):
+            KeyRing([SigningKey.from_config(hs_key("a"))], "b")
+
+    @pytest.mark.parametrize("alg", ["ES256", "EdDSA"])
+    def test_asymmetric_keys(self, alg):
+        private_pem, public_pem = pem_keypair(alg)
+        signer = KeyRing(
+            [SigningKey.from_config({"kid": "k", "alg": alg, "private_key": private_pem})],
+            "k",
+        )
+        token = signer.sign(payload())
+
+        jwk = signer.jwks()["keys"][0]
+        assert jwk["kid"] == "k" and "d" not in jwk
+
+        # Verify-only keys can't be active, so pair one with a signing key.
+        verify_only = SigningKey.from_config(
+            {"kid": "k", "alg": alg, "public_key": public_pem}
+        )
+        verifier = KeyRing([verify_only, SigningKey.from_config(hs_key("hs"))], "hs")
+        assert verifier.verify(token)["user_id"] == 1
+
+    def test_hs_key_cannot_verify_asymmetric_token(self):
+        private_pem, _ = pem_keypair("ES256")
+        ring = KeyRing(
+            [
+                SigningKey.from_config(hs_key("hs")),
+                SigningKey.from_config(
+                    {"kid": "ec", "alg": "ES256", "private_key": private_pem}
+                ),
+            ],
+            "hs",
+        )
+        forged = jwt.encode(payload(), "s" * 32, algorithm="HS256", headers={"kid": "ec"})
+
+        with pytest.raises(jwt.InvalidTokenError):
+            ring.verify(forged)
+
+
+class TestJWKSEndpoint:
+    def test_symmetric_secrets_are_not_published(self, api_client):
+        response = api_client.get(reverse("auth-jwks"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {"keys": []}
+
+    def test_login_with_rotated_key(self, settings, api_client, regular_user):
+        settings.JWT_SIGNING_KEYS = [hs_key("default"), hs_key("next", "n" * 32)]
+        settings.JWT_ACTIVE_KID = "next"
+
+        response = api_client.post(
+            reverse("auth-token"),
+            {"username": regular_user.username, "password": "password123"},
+        )
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data['access_token']}"
+        )
+
+        assert api_client.get(reverse("user-list")).status_code == status.HTTP_200_OK
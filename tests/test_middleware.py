@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from rest_framework import status
+
+from accounts.middleware import ALL_METHODS, compile_public_routes
+
+pytestmark = pytest.mark.django_db
+
+
+class TestPublicRoutes:
+    @pytest.fixture(scope="class")
+    def routes(self):
+        return compile_public_routes()
+
+    def methods_for(self, routes, url):
+        return routes[resolve(url).func]
+
+    def test_allow_any_actions_are_public(self, routes):
+        assert self.methods_for(routes, reverse("auth-token")) == {"POST"}
+        assert self.methods_for(routes, reverse("auth-refresh-token")) == {"POST"}
+        assert self.methods_for(routes, reverse("user-register")) == {"POST"}
+
+    def test_protected_actions(self, routes):
+        assert self.methods_for(routes, reverse("user-list")) == frozenset()
+        assert self.methods_for(routes, reverse("user-analytics")) == frozenset()
+        assert self.methods_for(routes, reverse("schema")) == frozenset()
+
+    def test_marked_and_admin_views(self, routes):
+        assert self.methods_for(routes, reverse("login")) is ALL_METHODS
+        assert self.methods_for(routes, reverse("dashboard")) is ALL_METHODS
+        assert self.methods_for(routes, reverse("admin:login")) is ALL_METHODS
+
+
+class TestAuthMiddleware:
+    def test_protected_route_requires_token(self, api_client):
+        response = api_client.get(reverse("user-list"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_invalid_token_rejected(self, api_client):
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+
+        response = api_client.get(reverse("user-list"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {"detail": "Invalid token"}
+
+    def test_public_pages_skip_jwt(self, client):
+        assert client.get(reverse("login")).status_code == status.HTTP_200_OK
+        assert client.get(reverse("admin:login")).status_code == status.HTTP_200_OK
+        assert client.get(reverse("dashboard")).status_code == status.HTTP_302_FOUND
+
+    def test_unknown_path_is_not_treated_as_public(self, client):
+        response = client.get("/dashboardx/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_bearer_request_never_loads_the_session(
+        self, authenticated_admin_client, admin_user
+    ):
+        authenticated_admin_client.force_login(admin_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_admin_client.get(reverse("user-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not [q for q in queries if "django_session" in q["sql"]]
+
+    def test_session_login_still_authenticates(self, api_client, admin_user):
+        api_client.force_login(admin_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse("user-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        sessions = [q for q in queries if "django_session" in q["sql"]]
+        assert len(sessions) == 1
+
+    def test_bad_token_on_public_view_is_anonymous(self, client):
+        response = client.get(reverse("login"), HTTP_AUTHORIZATION="Bearer nope")
+
+        assert response.status_code == status.HTTP_200_OK
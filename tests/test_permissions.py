@@ -0,0 +1,122 @@
+import time
+
+import pytest
+from django.contrib.auth.models import Group, Permission
+from django.urls import reverse
+from rest_framework import status
+
+from accounts.permissions import (
+    get_permissions_version,
+    get_role_permissions,
+    has_role_perm,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+class TestPermissionSnapshot:
+    def test_role_permissions_follow_groups(self):
+        assert get_role_permissions("admin") == {
+            "accounts.can_view_analytics",
+            "accounts.can_create_friends",
+            "accounts.can_manage_own_friends",
+        }
+        assert get_role_permissions("user") == {
+            "accounts.can_create_friends",
+            "accounts.can_manage_own_friends",
+        }
+        assert get_role_permissions("friend") == frozenset()
+
+    def test_warm_snapshot_resolves_without_queries(
+        self, regular_user, django_assert_num_queries
+    ):
+        regular_user.groups.add(Group.objects.get(name="User"))
+        has_role_perm(regular_user, "accounts.can_create_friends")
+
+        with django_assert_num_queries(0):
+            assert has_role_perm(regular_user, "accounts.can_create_friends")
+
+    def test_group_permission_change_invalidates(self, friend_user):
+        friend_user.groups.add(Group.objects.get(name="Friend"))
+        assert not has_role_perm(friend_user, "accounts.can_create_friends")
+
+        Group.objects.get(name="Friend").permissions.add(
+            Permission.objects.get(codename="can_create_friends")
+        )
+
+        assert has_role_perm(friend_user, "accounts.can_create_friends")
+
+    def test_falls_back_to_user_permissions(self, friend_user):
+        perm = Permission.objects.get(codename="can_create_friends")
+        assert not has_role_perm(friend_user, "accounts.can_create_friends")
+
+        friend_user.user_permissions.add(perm)
+        friend_user = type(friend_user).objects.get(pk=friend_user.pk)
+
+        assert has_role_perm(friend_user, "accounts.can_create_friends")
+
+    def test_superuser_has_every_permission(self, admin_user):
+        admin_user.is_superuser = True
+        admin_user.save()
+
+        assert has_role_perm(admin_user, "accounts.not_granted_to_any_group")
+
+    def test_role_permissions_need_group_membership(self, regular_user):
+        group = Group.objects.get(name="User")
+        assert not has_role_perm(regular_user, "accounts.can_create_friends")
+
+        regular_user.groups.add(group)
+        regular_user = type(regular_user).objects.get(pk=regular_user.pk)
+        assert has_role_perm(regular_user, "accounts.can_create_friends")
+
+        regular_user.groups.remove(group)
+        regular_user = type(regular_user).objects.get(pk=regular_user.pk)
+        assert not has_role_perm(regular_user, "accounts.can_create_friends")
+
+    def test_per_process_version_expires(self, monkeypatch):
+        version = get_permissions_version()
+        later = time.time() + 31
+        monkeypatch.setattr(time, "time", lambda: later)
+
+        assert get_permissions_version() != version
+
+    def test_shared_version_does_not_expire(self, shared_cache, monkeypatch):
+        version = get_permissions_version()
+        later = time.time() + 86400
+        monkeypatch.setattr(time, "time", lambda: later)
+
+        assert get_permissions_version() == version
+
+    def test_regular_user_can_create_friend(
+        self, regular_user, authenticated_user_client
+    ):
+        regular_user.groups.add(Group.objects.get(name="User"))
+        url = reverse("user-list")
+        data = {
+            "username": "newfriend",
+            "email": "newfriend@example.com",
+            "first_name": "New",
+            "last_name": "Friend",
+            "role": "friend",
+            "password": "password123",
+        }
+
+        response = authenticated_user_client.post(url, data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_user_outside_role_group_cannot_create_friend(
+        self, authenticated_user_client
+    ):
+        response = authenticated_user_client.post(
+            reverse("user-list"), {"username": "nope", "role": "friend"}
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_friend_cannot_create_users(self, authenticated_friend_client):
+        url = reverse("user-list")
+
+        response = authenticated_friend_client.post(url, {"username": "nope"})
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
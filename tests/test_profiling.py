@@ -0,0 +1,96 @@
+import re
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+
+from accounts.profiling import ProfilingMiddleware, profile_store, profiled
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profiling(settings):
+    settings.PROFILING = {"ENABLED": True, "SAMPLE_RATE": 1.0, "SERVER_TIMING": True}
+    profile_store.clear()
+    yield
+    profile_store.clear()
+
+
+class TestProfilingMiddleware:
+    @pytest.mark.usefixtures("shared_cache")
+    def test_server_timing_header(self, profiling, authenticated_user_client):
+        response = authenticated_user_client.get(reverse("user-list"))
+
+        timings = {
+            entry.split(";")[0]: entry for entry in response["Server-Timing"].split(", ")
+        }
+        assert {"jwt", "perm", "ser", "db", "total"} <= set(timings)
+        assert 'desc="2 queries"' in timings["db"]
+
+    def test_histograms_visible_to_admins_only(
+        self, profiling, authenticated_admin_client
+    ):
+        authenticated_admin_client.get(reverse("user-list"))
+
+        response = authenticated_admin_client.get(reverse("profiling"))
+
+        assert response.status_code == status.HTTP_200_OK
+        histogram = response.data["views"]["user-list"]["total"]
+        assert histogram["count"] == 1
+        assert sum(histogram["buckets"].values()) == 1
+
+    def test_regular_user_cannot_read_histograms(self, authenticated_user_client):
+        response = authenticated_user_client.get(reverse("profiling"))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_disabled_by_default(self, authenticated_user_client):
+        response = authenticated_user_client.get(reverse("user-list"))
+
+        assert "Server-Timing" not in response
+
+    def test_unsampled_requests_are_not_recorded(
+        self, settings, authenticated_user_client
+    ):
+        settings.PROFILING = {"ENABLED": True, "SAMPLE_RATE": 0.0}
+        profile_store.clear()
+
+        response = authenticated_user_client.get(reverse("user-list"))
+
+        assert "Server-Timing" not in response
+        assert profile_store.snapshot() == {}
+
+
+def test_profiled_is_noop_outside_sampled_requests():
+    assert profiled("x") is profiled("y")
+
+
+def test_middleware_is_async_under_asgi(profiling):
+    async def get_response(request):
+        return None
+
+    assert iscoroutinefunction(ProfilingMiddleware(get_response))
+
+
+@pytest.mark.urls("tests.async_urls")
+def test_async_views_are_profiled(profiling, regular_user):
+    client = AsyncClient()
+    token = async_to_sync(client.post)(
+        reverse("auth-token"),
+        {"username": regular_user.username, "password": "password123"},
+    ).json()["access_token"]
+    # The async ORM queries on the sync thread, whose connection opens after
+    # the middleware is loaded in a deployment; here it is the test's own.
+    connection_created.send(sender=type(connection), connection=connection)
+
+    response = async_to_sync(client.get)(
+        reverse("user-list"), headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    queries = re.search(r'desc="(\d+) queries"', response["Server-Timing"])
+    assert int(queries.group(1)) > 0
@@ -0,0 +1,109 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.db.models import Count
+from django.urls import reverse
+
+from accounts.models import User
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="reads SQLite EXPLAIN QUERY PLAN output"
+    ),
+]
+
+# A bare "SCAN accounts_user" (without "USING ... INDEX") is a table scan.
+TABLE_SCAN = re.compile(r"\bSCAN accounts_user\b(?! USING)")
+
+
+def user_queries(client, url):
+    """SELECTs against accounts_user issued while serving ``url``."""
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [
+        query["sql"]
+        for query in ctx.captured_queries
+        if re.search(r'FROM "accounts_user"(?!_)', query["sql"])
+    ]
+
+
+def query_plan(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.fixture
+def population(regular_user, regular_user_factory, friend_user_factory):
+    for _ in range(3):
+        friend_user_factory(created_by=regular_user)
+        regular_user_factory()
+    return regular_user
+
+
+@pytest.mark.parametrize(
+    "client_fixture, url_name",
+    [
+        ("authenticated_admin_client", "user-list"),
+        ("authenticated_user_client", "user-list"),
+        ("authenticated_user_client", "user-my-friends"),
+        ("authenticated_admin_client", "user-my-friends"),
+    ],
+)
+def test_user_queries_use_indexes(request, population, client_fixture, url_name):
+    client = request.getfixturevalue(client_fixture)
+
+    queries = user_queries(client, reverse(url_name))
+
+    assert queries
+    for sql in queries:
+        plan = query_plan(sql)
+        assert not any(TABLE_SCAN.search(step) for step in plan), (sql, plan)
+
+
+def test_union_scope_uses_indexes(settings, population, authenticated_user_client):
+    settings.USER_SCOPE_UNION = True
+
+    queries = user_queries(authenticated_user_client, reverse("user-list"))
+
+    assert any("UNION" in sql for sql in queries)
+    for sql in queries:
+        plan = query_plan(sql)
+        assert not any(TABLE_SCAN.search(step) for step in plan), (sql, plan)
+
+
+@pytest.mark.parametrize("url_name", ["user-list", "user-my-friends"])
+def test_cursor_pages_need_no_sort(population, authenticated_admin_client, url_name):
+    for sql in user_queries(authenticated_admin_client, reverse(url_name)):
+        plan = query_plan(sql)
+        assert not any("TEMP B-TREE" in step for step in plan), (sql, plan)
+
+
+def test_regular_user_detail_is_a_primary_key_seek(population, authenticated_user_client):
+    friend = population.created_friends.first()
+
+    queries = user_queries(
+        authenticated_user_client, reverse("user-detail", args=[friend.pk])
+    )
+
+    plans = [query_plan(sql) for sql in queries]
+    assert plans
+    assert all(plan == [plan[0]] and "PRIMARY KEY" in plan[0] for plan in plans), plans
+
+
+def test_friend_totals_use_an_index(population):
+    # The per-creator friend count that counter reconciliation runs.
+    friends = (
+        User.objects.order_by()
+        .filter(role=User.FRIEND, created_by__isnull=False)
+        .values("created_by_id")
+        .annotate(n=Count("id"))
+    )
+
+    plan = query_plan(*friends.query.sql_with_params())
+
+    assert not any(TABLE_SCAN.search(step) for step in plan), plan
@@ -0,0 +1,100 @@
+import io
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from accounts import renderers
+from accounts.renderers import FastJSONParser, FastJSONRenderer
+
+PAYLOAD = {
+    "next": None,
+    "previous": "http://testserver/api/v1/users/?cursor=abc",
+    "meta": {
+        1: "int key",
+        "joined": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        "day": date(2024, 5, 1),
+        "amount": Decimal("1.50"),
+        "id": uuid.UUID(int=1),
+        "label": gettext_lazy("Admin"),
+        "text": "café\u2028line\u2029",
+    },
+    "results": [{"username": f"user{n}", "active": n % 2 == 0} for n in range(7)],
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(renderers, "orjson", None)
+    elif renderers.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+class TestFastJSONRenderer:
+    def test_output_matches_drf(self, encoder):
+        assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_indented_output_matches_drf(self, encoder):
+        media_type = "application/json; indent=2"
+
+        assert FastJSONRenderer().render(PAYLOAD, media_type) == JSONRenderer().render(
+            PAYLOAD, media_type
+        )
+
+    @pytest.mark.parametrize("chunk_rows", [1, 3, 100])
+    def test_chunks_join_to_the_full_document(self, encoder, chunk_rows):
+        renderer = FastJSONRenderer()
+
+        chunks = list(renderer.iter_render(PAYLOAD, chunk_rows))
+
+        assert b"".join(chunks) == renderer.render(PAYLOAD)
+
+    def test_chunks_of_an_empty_page(self, encoder):
+        data = {"next": None, "results": []}
+        renderer = FastJSONRenderer()
+
+        assert b"".join(renderer.iter_render(data, 10)) == renderer.render(data)
+
+
+class TestFastJSONParser:
+    def test_parses_like_drf(self, encoder):
+        body = json.dumps({"name": "café", "n": [1, 2.5, None]}).encode()
+
+        assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(
+            io.BytesIO(body)
+        )
+
+    def test_malformed_body(self, encoder):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": '))
+
+
+@pytest.mark.django_db
+class TestStreamedLists:
+    def test_large_pages_are_streamed(
+        self, settings, authenticated_admin_client, regular_user_factory
+    ):
+        settings.JSON_STREAMING = {"MIN_ROWS": 3, "CHUNK_ROWS": 2}
+        regular_user_factory.create_batch(4)
+
+        response = authenticated_admin_client.get(reverse("user-list"))
+
+        assert response.streaming
+        assert response["ETag"]
+        body = json.loads(b"".join(response.streaming_content))
+        assert len(body["results"]) == 5
+
+    def test_small_pages_are_not_streamed(self, authenticated_admin_client):
+        response = authenticated_admin_client.get(reverse("user-list"))
+
+        assert not response.streaming
+        assert response.json()["results"]
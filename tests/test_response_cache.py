@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+
+from accounts.response_cache import get_or_build
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("shared_cache")]
+
+
+class TestCachedResponses:
+    @pytest.mark.parametrize("url_name", ["user-list", "user-my-friends"])
+    def test_repeated_list_is_served_without_queries(
+        self,
+        authenticated_user_client,
+        regular_user,
+        friend_user_factory,
+        django_assert_num_queries,
+        url_name,
+    ):
+        friend_user_factory(created_by=regular_user)
+        url = reverse(url_name)
+        first = authenticated_user_client.get(url)
+
+        with django_assert_num_queries(0):
+            second = authenticated_user_client.get(url)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data == first.data
+
+    def test_analytics_is_cached_until_a_user_changes(
+        self, authenticated_admin_client, regular_user_factory, django_assert_num_queries
+    ):
+        url = reverse("user-analytics")
+        before = authenticated_admin_client.get(url).data["total_users"]
+        with django_assert_num_queries(0):
+            authenticated_admin_client.get(url)
+
+        regular_user_factory()
+
+        assert authenticated_admin_client.get(url).data["total_users"] == before + 1
+
+    def test_friend_edit_only_rebuilds_its_creators_scope(
+        self,
+        authenticated_user_client,
+        regular_user,
+        regular_user_factory,
+        friend_user_factory,
+        django_assert_num_queries,
+    ):
+        friend = friend_user_factory(created_by=regular_user)
+        other_friend = friend_user_factory(created_by=regular_user_factory())
+        url = reverse("user-my-friends")
+        authenticated_user_client.get(url)
+
+        other_friend.first_name = "Elsewhere"
+        other_friend.save()
+        with django_assert_num_queries(0):
+            authenticated_user_client.get(url)
+
+        friend.first_name = "Renamed"
+        friend.save()
+        response = authenticated_user_client.get(url)
+        assert response.data["results"][0]["first_name"] == "Renamed"
+
+    def test_group_change_rebuilds_responses(
+        self, authenticated_user_client, django_assert_max_num_queries
+    ):
+        url = reverse("user-list")
+        authenticated_user_client.get(url)
+
+        Group.objects.create(name="Auditors")
+
+        with django_assert_max_num_queries(10) as ctx:
+            authenticated_user_client.get(url)
+        assert any('FROM "accounts_user"' in q["sql"] for q in ctx.captured_queries)
+
+    def test_cache_can_be_disabled(
+        self, settings, authenticated_user_client, django_assert_num_queries
+    ):
+        settings.USER_RESPONSE_CACHE = {"ALIAS": None}
+        url = reverse("user-list")
+        authenticated_user_client.get(url)
+
+        with django_assert_num_queries(1):
+            authenticated_user_client.get(url)
+
+
+class TestStampedeLock:
+    def test_concurrent_misses_build_once(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"built": True}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_build("k", build)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"built": True}] * 5
+
+    def test_waiters_build_themselves_after_lock_timeout(self, settings):
+        settings.USER_RESPONSE_CACHE = {
+            "ALIAS": "responses",
+            "TIMEOUT": 300,
+            "LOCK_TIMEOUT": 0.1,
+        }
+        # A rebuild that died without releasing its lock.
+        caches["responses"].add("k:lock", 1, 60)
+
+        assert get_or_build("k", lambda: "fresh") == "fresh"
@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth.models import Group
+
+from accounts.models import User
+from accounts.utils import get_group_id
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def warm_caches():
+    get_group_id("Admin")
+
+
+class TestUserSaveQueries:
+    """
+    Query budgets for each User save path. A change here means a signal
+    handler started doing more work per save; update the number only if
+    that is intended.
+    """
+
+    def test_create_regular_user(self, regular_user, django_assert_num_queries):
+        # regular_user makes sure today's counter rows already exist.
+        user = User(username="counted", password="x")
+        with django_assert_num_queries(5):
+            user.save()
+
+    def test_full_save_regular_user(self, regular_user, django_assert_num_queries):
+        user = User.objects.get(pk=regular_user.pk)
+        user.first_name = "Changed"
+        with django_assert_num_queries(3):
+            user.save()
+
+    def test_update_fields_regular_user(
+        self, regular_user, django_assert_num_queries
+    ):
+        user = User.objects.get(pk=regular_user.pk)
+        with django_assert_num_queries(1):
+            user.save(update_fields=["last_login"])
+
+    def test_create_superuser(self, django_assert_num_queries):
+        User.objects.create_superuser("first-root", None, "x")
+        user = User(username="root", password="x", is_superuser=True)
+        with django_assert_num_queries(7):
+            user.save()
+        assert user.role == "admin"
+        assert list(user.groups.values_list("name", flat=True)) == ["Admin"]
+
+    def test_full_save_superuser(self, django_assert_num_queries):
+        user = User.objects.create_superuser("root", None, "x")
+        user = User.objects.get(pk=user.pk)
+        with django_assert_num_queries(4):
+            user.save()
+
+    def test_update_fields_superuser(self, django_assert_num_queries):
+        user = User.objects.create_superuser("root", None, "x")
+        user = User.objects.get(pk=user.pk)
+        with django_assert_num_queries(1):
+            user.save(update_fields=["last_login"])
+
+
+class TestGroupCache:
+    def test_group_ids_are_cached(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert get_group_id("Admin") is not None
+
+    def test_renamed_group_is_reloaded(self):
+        group = Group.objects.get(name="Admin")
+        group.name = "Administrators"
+        group.save()
+
+        assert get_group_id("Admin") is None
+        assert get_group_id("Administrators") == group.pk
@@ -0,0 +1,174 @@
+import base64
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from accounts import throttling
+from accounts.throttling import CacheBucketStore, MemoryBucketStore, parse_rate
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(throttling.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(throttling.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def scopes(settings):
+    def configure(**scopes):
+        settings.THROTTLING = {**settings.THROTTLING, "SCOPES": scopes}
+
+    return configure
+
+
+def login(client, username, password="password123", **extra):
+    return client.post(
+        reverse("auth-token"), {"username": username, "password": password}, **extra
+    )
+
+
+def test_parse_rate():
+    assert parse_rate("10/min") == (10, 60)
+    assert parse_rate("5/s") == (5, 1)
+    assert parse_rate("100/day") == (100, 86400)
+
+
+@pytest.mark.parametrize(
+    "store", [MemoryBucketStore(), CacheBucketStore("default")], ids=["memory", "cache"]
+)
+def test_store_admits_capacity_then_waits(clock, store):
+    admitted = [store.consume("k", 3, 60) for _ in range(3)]
+    wait = store.consume("k", 3, 60)
+
+    assert admitted == [0, 0, 0]
+    assert 0 < wait <= 60
+    assert store.consume("other", 3, 60) == 0
+
+
+def test_memory_bucket_refills_gradually(clock):
+    store = MemoryBucketStore()
+    for _ in range(3):
+        store.consume("k", 3, 60)
+
+    assert store.consume("k", 3, 60) == pytest.approx(20)
+    clock[0] += 20
+    assert store.consume("k", 3, 60) == 0
+    assert store.consume("k", 3, 60) == pytest.approx(20)
+
+
+def test_memory_store_stays_bounded(clock):
+    store = MemoryBucketStore(max_keys=10)
+
+    for n in range(25):
+        store.consume(f"k{n}", 1, 60)
+
+    assert len(store._full_at) <= 10
+
+
+@pytest.mark.django_db
+class TestAuthThrottles:
+    def test_username_limit_stops_before_password_check(
+        self, api_client, regular_user, scopes
+    ):
+        scopes(login={"username": "2/min"})
+        login(api_client, regular_user.username)
+        login(api_client, regular_user.username.upper())
+
+        with mock.patch("accounts.views.authenticate_credentials") as check:
+            response = login(api_client, regular_user.username)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response["Retry-After"]) > 0
+        check.assert_not_called()
+
+    def test_ip_limit_spans_usernames(self, api_client, scopes):
+        scopes(login={"ip": "3/min"})
+
+        codes = [login(api_client, f"nobody{n}").status_code for n in range(4)]
+
+        assert codes == [401, 401, 401, 429]
+        other_ip = login(api_client, "nobody", REMOTE_ADDR="10.0.0.2")
+        assert other_ip.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_ip_limit_ignores_forwarded_for(self, api_client, scopes):
+        scopes(login={"ip": "3/min"})
+
+        codes = [
+            login(
+                api_client, f"nobody{n}", HTTP_X_FORWARDED_FOR=f"203.0.113.{n}"
+            ).status_code
+            for n in range(4)
+        ]
+
+        assert codes == [401, 401, 401, 429]
+
+    def test_route_limit_is_shared(self, api_client, scopes):
+        scopes(login={"route": "2/min"})
+
+        login(api_client, "a", REMOTE_ADDR="10.0.0.1")
+        login(api_client, "b", REMOTE_ADDR="10.0.0.2")
+        response = login(api_client, "c", REMOTE_ADDR="10.0.0.3")
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_register_is_throttled_before_validation(self, api_client, scopes):
+        scopes(register={"ip": "1/hour"})
+        url = reverse("user-register")
+        api_client.post(url, {})
+
+        with mock.patch("accounts.views.RegisterSerializer") as serializer:
+            response = api_client.post(url, {})
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        serializer.assert_not_called()
+
+    def test_refresh_is_throttled(self, api_client, scopes):
+        scopes(refresh={"ip": "1/min"})
+        url = reverse("auth-refresh-token")
+
+        first = api_client.post(url, {"refresh_token": "x"})
+        second = api_client.post(url, {"refresh_token": "x"})
+
+        assert first.status_code == status.HTTP_401_UNAUTHORIZED
+        assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    @pytest.mark.parametrize("url_name", ["auth-token", "user-register"])
+    def test_basic_auth_header_is_throttled(
+        self, api_client, regular_user, scopes, url_name
+    ):
+        scopes(login={"ip": "2/min"}, register={"ip": "2/min"})
+        credentials = base64.b64encode(f"{regular_user.username}:guess".encode())
+        api_client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials.decode()}")
+
+        with mock.patch.object(
+            type(regular_user), "check_password", return_value=False
+        ) as check:
+            codes = [api_client.post(reverse(url_name), {}).status_code for _ in range(3)]
+
+        assert codes[-1] == status.HTTP_429_TOO_MANY_REQUESTS
+        assert status.HTTP_403_FORBIDDEN not in codes
+        check.assert_not_called()
+
+    def test_shared_cache_store(self, settings, api_client, regular_user):
+        settings.THROTTLING = {
+            **settings.THROTTLING,
+            "STORE": "cache",
+            "SCOPES": {"login": {"username": "1/min"}},
+        }
+
+        assert login(api_client, regular_user.username).status_code == 200
+        assert login(api_client, regular_user.username).status_code == 429
+
+    def test_disabled(self, settings, api_client):
+        settings.THROTTLING = {
+            "ENABLED": False,
+            "SCOPES": {"login": {"ip": "1/min"}},
+        }
+
+        codes = {login(api_client, "nobody").status_code for _ in range(3)}
+
+        assert codes == {status.HTTP_401_UNAUTHORIZED}
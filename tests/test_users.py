@@ -1,6 +1,194 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
+from accounts.models import User
+from accounts.serializers import RowSerializer, UserSerializer
+
 pytestmark = pytest.mark.django_db
 
+
+
+class TestUserPagination:
+    def test_admin_list_is_cursor_paginated(
+        self, authenticated_admin_client, regular_user_factory
+    ):
+        regular_user_factory.create_batch(3)
+        url = reverse("user-list")
+
+        response = authenticated_admin_client.get(url, {"page_size": 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 2
+        assert response.data["next"] is not None
+
+        seen = [user["username"] for user in response.data["results"]]
+        while response.data["next"]:
+            response = authenticated_admin_client.get(response.data["next"])
+            seen.extend(user["username"] for user in response.data["results"])
+        assert len(seen) == len(set(seen)) == 4
+
+    def test_my_friends_is_paginated(
+        self, authenticated_user_client, regular_user, friend_user_factory
+    ):
+        friend_user_factory.create_batch(3, created_by=regular_user)
+        url = reverse("user-my-friends")
+
+        response = authenticated_user_client.get(url, {"page_size": 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 2
+        assert response.data["next"] is not None
+
+
+    @pytest.mark.parametrize("union", [False, True])
+    def test_regular_user_scope_pages(
+        self,
+        settings,
+        authenticated_user_client,
+        regular_user,
+        friend_user_factory,
+        regular_user_factory,
+        union,
+    ):
+        settings.USER_SCOPE_UNION = union
+        friends = friend_user_factory.create_batch(3, created_by=regular_user)
+        regular_user_factory()
+        url = reverse("user-list")
+
+        response = authenticated_user_client.get(url, {"page_size": 2})
+        seen = [user["username"] for user in response.data["results"]]
+        while response.data["next"]:
+            response = authenticated_user_client.get(response.data["next"])
+            seen.extend(user["username"] for user in response.data["results"])
+
+        expected = sorted(
+            [regular_user, *friends], key=lambda u: (u.date_joined, u.id), reverse=True
+        )
+        assert seen == [user.username for user in expected]
+
+
+class TestSparseFieldsets:
+    def test_fields_limits_output(self, authenticated_admin_client):
+        url = reverse("user-list")
+
+        response = authenticated_admin_client.get(url, {"fields": "username,role"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data["results"][0]) == {"username", "role"}
+
+    def test_fields_limits_loaded_columns(self, authenticated_admin_client):
+        url = reverse("user-list")
+        with CaptureQueriesContext(connection) as ctx:
+            authenticated_admin_client.get(url, {"fields": "username"})
+
+        list_query = ctx.captured_queries[-1]["sql"]
+        assert '"accounts_user"."username"' in list_query
+        assert '"accounts_user"."email"' not in list_query
+
+    def test_unknown_field_is_rejected(self, authenticated_admin_client):
+        url = reverse("user-list")
+
+        response = authenticated_admin_client.get(url, {"fields": "username,nope"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestReadSerialization:
+    @pytest.mark.parametrize("url_name", ["user-list", "user-my-friends"])
+    def test_lists_never_include_password(
+        self, authenticated_user_client, regular_user, friend_user_factory, url_name
+    ):
+        friend_user_factory(created_by=regular_user)
+
+        response = authenticated_user_client.get(reverse(url_name))
+
+        assert response.data["results"]
+        for row in response.data["results"]:
+            assert set(row) == {"username", "email", "first_name", "last_name", "role"}
+
+    def test_detail_never_includes_password(
+        self, authenticated_admin_client, regular_user
+    ):
+        response = authenticated_admin_client.get(
+            reverse("user-detail", args=[regular_user.pk])
+        )
+
+        assert "password" not in response.data
+
+    def test_password_cannot_be_requested(self, authenticated_admin_client):
+        response = authenticated_admin_client.get(
+            reverse("user-list"), {"fields": "username,password"}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize(
+        "fields", [UserSerializer.output_fields(), ["role"], ["email", "username"]]
+    )
+    def test_rows_match_user_serializer(self, regular_user_factory, fields):
+        regular_user_factory.create_batch(3, last_name="")
+        users = User.objects.order_by("pk")
+        rows = users.values_list("id", *fields, named=True)
+
+        expected = [
+            {name: data[name] for name in fields}
+            for data in UserSerializer(users, many=True).data
+        ]
+        assert RowSerializer(UserSerializer, rows, fields).data == expected
+
+
+class TestUserSearch:
+    def test_prefix_search(self, authenticated_admin_client, regular_user_factory):
+        regular_user_factory(username="alexandra", first_name="Alex")
+        regular_user_factory(username="bob", first_name="Bob")
+        url = reverse("user-list")
+
+        response = authenticated_admin_client.get(url, {"search": "alex"})
+
+        usernames = [user["username"] for user in response.data["results"]]
+        assert usernames == ["alexandra"]
+
+    @pytest.mark.parametrize("term", ["mith", "SMI", "th@exa", "sm"])
+    def test_search_matches_substrings(
+        self, authenticated_admin_client, regular_user_factory, term
+    ):
+        regular_user_factory(username="jsmith", email="smith@example.com")
+        regular_user_factory(username="bob", email="bob@example.org")
+
+        response = authenticated_admin_client.get(
+            reverse("user-list"), {"search": term}
+        )
+
+        usernames = {user["username"] for user in response.data["results"]}
+        assert "jsmith" in usernames
+        assert "bob" not in usernames
+
+    def test_search_respects_role_scope(
+        self, authenticated_user_client, regular_user, regular_user_factory
+    ):
+        regular_user_factory(username="scoped-out")
+        url = reverse("user-list")
+
+        response = authenticated_user_client.get(url, {"search": "scoped"})
+
+        assert response.data["results"] == []
+
+    def test_index_follows_updates_and_deletes(
+        self, authenticated_admin_client, regular_user_factory
+    ):
+        user = regular_user_factory(first_name="Zelda")
+        url = reverse("user-list")
+
+        def search(term):
+            return authenticated_admin_client.get(url, {"search": term}).data["results"]
+
+        user.first_name = "Yvonne"
+        user.save()
+        assert search("zelda") == []
+        assert len(search("yvonne")) == 1
+
+        user.delete()
+        assert search("yvonne") == []
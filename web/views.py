@@ -2,7 +2,10 @@ from django.shortcuts import redirect, render
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.contrib.auth.decorators import login_required
 
+from accounts.middleware import auth_exempt
 
+
+@auth_exempt
 @ensure_csrf_cookie
 def login_view(request):
     if request.user.is_authenticated:
@@ -10,6 +13,7 @@ def login_view(request):
     return render(request, "web/login.html")
 
 
+@auth_exempt
 @ensure_csrf_cookie
 def register_view(request):
     """Render registration page"""
@@ -18,6 +22,7 @@ def register_view(request):
     return render(request, "web/signup.html")
 
 
+@auth_exempt
 @login_required
 def dashboard_view(request):
     """Render dashboard page"""